@@ -0,0 +1,96 @@
+from instance import Instance
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+def get_costs(instance: Instance, robots: List[Tuple[int, int, int]],
+              orders: List[List[int]]) -> Tuple[np.ndarray, List[int]]:
+    """Cost matrix of the centralized shelf assignment (as in goals.lp)
+    robots: [(id,x,y)], orders: order [id,product,station] of each robot
+    Returns the matrix (rows: robots, columns: shelves) and the shelf ids of the columns
+    The cost is the manhattan distance start -> shelf -> station -> shelf, inf if the shelf doesn't hold the product
+    """
+    shelves = np.array([id for id, _, _ in instance.shelves], dtype=int)
+    positions = np.array([(x, y) for _, x, y in instance.shelves], dtype=int).reshape(-1, 2)
+    stations = {id: (x, y) for id, x, y in instance.pickingstations}
+    products: Dict[int, set] = {}
+    for product, shelf in instance.products:
+        products.setdefault(product, set()).add(shelf)
+
+    costs = np.full((len(robots), len(shelves)), np.inf)
+    for i, ((_, x, y), order) in enumerate(zip(robots, orders)):
+        if order[2] not in stations:
+            continue
+        mask = np.isin(shelves, list(products.get(order[1], [])))
+        distances = np.abs(positions - np.array([x, y])).sum(axis=1) + \
+            2 * np.abs(positions - np.array(stations[order[2]])).sum(axis=1)
+        costs[i, mask] = distances[mask]
+    return costs, shelves.tolist()
+
+
+def min_cost_assignment(costs: np.ndarray) -> List[int]:
+    """Hungarian method (shortest augmenting paths) for a matrix with at most as many rows as columns
+    Returns the column of each row, the sum of the costs is minimal
+    Infeasible entries are inf, an empty list is returned if there is no assignment with finite cost
+    """
+    n, m = costs.shape
+    if n > m:
+        return []
+    # inf is replaced by a cost which is larger than any assignment with finite costs
+    finite = costs[np.isfinite(costs)]
+    big = (np.abs(finite).sum() + 1) * (n + 1)
+    matrix = np.where(np.isfinite(costs), costs, big)
+
+    # potentials of rows and columns, column 0 is a virtual column for the row which is added next (1-indexed)
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    row = np.zeros(m + 1, dtype=int)  # row assigned to each column (0 = free)
+    way = np.zeros(m + 1, dtype=int)  # previous column on the augmenting path
+    for i in range(1, n + 1):
+        row[0] = i
+        column = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[column] = True
+            current = matrix[row[column] - 1] - u[row[column]] - v[1:]
+            better = ~used[1:] & (current < minv[1:])
+            minv[1:][better] = current[better]
+            way[1:][better] = column
+            candidates = np.where(used[1:], np.inf, minv[1:])
+            next_column = int(np.argmin(candidates)) + 1
+            delta = candidates[next_column - 1]
+            u[row[used]] += delta
+            v[used] -= delta
+            minv[~used] -= delta
+            column = next_column
+            if row[column] == 0:
+                break
+        # augment along the path
+        while column != 0:
+            previous = way[column]
+            row[column] = row[previous]
+            column = previous
+
+    assignment = [-1] * n
+    for j in range(1, m + 1):
+        if row[j] != 0:
+            assignment[row[j] - 1] = j - 1
+    if any(not np.isfinite(costs[i, j]) for i, j in enumerate(assignment)):
+        return []
+    return assignment
+
+
+def get_assignment_cost(instance: Instance, robots: List[Tuple[int, int, int]], orders: List[List[int]],
+                        shelves: Dict[int, int]) -> int:
+    """Cost (see get_costs) of an assignment, shelves: key: robot id, value: shelf"""
+    positions = {id: (x, y) for id, x, y in instance.shelves}
+    stations = {id: (x, y) for id, x, y in instance.pickingstations}
+    cost = 0
+    for (rid, x, y), order in zip(robots, orders):
+        shelf = positions[shelves[rid]]
+        station = stations[order[2]]
+        cost += abs(shelf[0] - x) + abs(shelf[1] - y) + 2 * (abs(station[0] - shelf[0]) + abs(station[1] - shelf[1]))
+    return cost
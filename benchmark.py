@@ -0,0 +1,151 @@
+from instance import compile_instance
+
+import argparse
+import csv
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from glob import glob
+from pathlib import Path
+from time import time
+from typing import List, Optional
+
+# directory of pathfind.py (the encodings are loaded relative to it)
+DIRECTORY = Path(__file__).resolve().parent
+# columns which are in every results table, followed by the statistics of the runs
+COLUMNS = ["instance", "strategy", "domain", "repetition", "status", "returncode", "plan_length", "wall_time",
+           "run_time", "solve_time", "solves"]
+
+
+def get_runs(patterns: List[str], strategies: List[str], domains: List[str], repetitions: int) -> List[tuple]:
+    """Returns all runs (instance, strategy, domain, repetition) for the instances matching the glob patterns"""
+    instances = []
+    for pattern in patterns:
+        for instance in sorted(glob(pattern)) or [pattern]:
+            if instance not in instances:
+                instances.append(instance)
+    return [(instance, strategy, domain, repetition) for instance in instances for strategy in strategies
+            for domain in domains for repetition in range(repetitions)]
+
+
+def limit_memory(memory: int) -> None:
+    """Limits the address space of the process to memory megabytes (called in the child process)"""
+    resource.setrlimit(resource.RLIMIT_AS, (memory * 2 ** 20, memory * 2 ** 20))
+
+
+def run(instance: str, strategy: str, domain: str, repetition: int, arguments: List[str], timeout: Optional[float],
+        memory: Optional[int]) -> dict:
+    """Runs pathfind.py -b for one instance, strategy and domain in its own process
+    Returns the row of the results table (statistics of the run, number of solved programs and their solving time)"""
+    row = {"instance": instance, "strategy": strategy, "domain": domain, "repetition": repetition}
+    with tempfile.TemporaryDirectory() as results:
+        command = [sys.executable, str(DIRECTORY / "pathfind.py"), "-s", strategy, "-d", domain, "-b", "-n", "-r",
+                   results] + arguments + [str(Path(instance).resolve())]
+        ts = time()
+        try:
+            process = subprocess.run(command, cwd=DIRECTORY, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                     timeout=timeout, text=True,
+                                     preexec_fn=(lambda: limit_memory(memory)) if memory else None)
+        except subprocess.TimeoutExpired:
+            row.update({"status": "timeout", "returncode": None, "wall_time": time() - ts})
+            return row
+        row["wall_time"] = time() - ts
+        row["returncode"] = process.returncode
+        if process.returncode == 0:
+            row["status"] = "ok"
+        elif "MemoryError" in process.stderr or "std::bad_alloc" in process.stderr:
+            row["status"] = "memory"
+        else:
+            row["status"] = "error"
+
+        # main.json holds the statistics and the timers of the run (see Benchmarker.get_summary)
+        for file in Path(results).rglob("main.json"):
+            with open(file) as f:
+                stats = json.load(f)
+            solves = stats.pop("solves", {})
+            row["solves"] = sum(values["count"] for values in solves.values())
+            row["solve_time"] = sum(values["total"] for values in solves.values())
+            row.update(flatten(stats))
+            row.update(flatten({"solves": solves}))
+    return row
+
+
+def flatten(stats: dict, prefix: str = "") -> dict:
+    """Nested statistics as one level (e.g. phases_planning_total)"""
+    row = {}
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            row.update(flatten(value, prefix + key + "_"))
+        else:
+            row[prefix + key] = value
+    return row
+
+
+def write_results(rows: List[dict], path: str) -> None:
+    """Writes the results table as .csv, .jsonl or .parquet (needs pandas)"""
+    columns = COLUMNS + sorted({key for row in rows for key in row} - set(COLUMNS))
+    if path.endswith(".jsonl"):
+        with open(path, "w") as f:
+            for row in rows:
+                print(json.dumps({column: row.get(column) for column in columns}), file=f)
+    elif path.endswith(".parquet"):
+        # optional dependency, only needed for parquet files
+        import pandas
+        pandas.DataFrame(rows, columns=columns).to_parquet(path)
+    else:
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, columns)
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Runs pathfind.py in benchmarking mode for all combinations of "
+                                                 "instances, strategies and domains and writes one results table",
+                                     usage='%(prog)s [options] instances')
+    parser.add_argument("instances", help="instances or glob patterns (e.g. 'instances/graph/16x10/*.lp')", nargs="+")
+    parser.add_argument("-s", "--strategies", help="strategies to be used (default: sequential shortest crossing "
+                                                   "prioritized)", nargs="+",
+                        choices=['sequential', 'shortest', 'crossing', 'prioritized', 'traffic', 'centralized'],
+                        default=['sequential', 'shortest', 'crossing', 'prioritized'])
+    parser.add_argument("-d", "--domains", help="domains to be used (default: b m)", nargs="+", choices=["b", "m"],
+                        default=["b", "m"])
+    parser.add_argument("-n", "--repetitions", help="number of runs of each combination (default: 1)", default=1,
+                        type=int)
+    parser.add_argument("-j", "--jobs", help="number of runs at the same time (default: 1)", default=1, type=int)
+    parser.add_argument("-t", "--timeout", help="timeout of a single run in seconds (default: none)", default=None,
+                        type=float)
+    parser.add_argument("-m", "--memory", help="memory limit of a single run in megabytes (default: none)",
+                        default=None, type=int)
+    parser.add_argument("-o", "--output", help="results table: .csv (default: './results/benchmark.csv'), .jsonl or "
+                                               ".parquet", default="./results/benchmark.csv", type=str)
+    parser.add_argument("-a", "--arguments", help="additional arguments of pathfind.py (e.g. '-e --planner native')",
+                        default="", type=str)
+    parser.add_argument("--cache", help="directory for the cache of compiled instances (default: './cache')",
+                        default='./cache/', type=str)
+    args = parser.parse_args()
+
+    runs = get_runs(args.instances, args.strategies, args.domains, args.repetitions)
+    arguments = args.arguments.split() + ["--cache", str(Path(args.cache).resolve())]
+
+    # the instances are compiled once, all runs load them from the cache
+    for instance in sorted({run_args[0] for run_args in runs}):
+        compile_instance(instance, str(Path(args.cache).resolve()), ["-Wnone"])
+
+    rows = []
+    # every run is a separate process, the threads only wait for the processes
+    with ThreadPoolExecutor(args.jobs) as executor:
+        futures = [executor.submit(run, *run_args, arguments, args.timeout, args.memory) for run_args in runs]
+        for future in as_completed(futures):
+            row = future.result()
+            rows.append(row)
+            print(str(len(rows)) + "/" + str(len(runs)) + " " + row["status"] + " " + row["strategy"] + " " +
+                  row["domain"] + " " + row["instance"] + " (" + str(round(row["wall_time"], 2)) + "s)",
+                  file=sys.stderr)
+
+    rows.sort(key=lambda row: runs.index((row["instance"], row["strategy"], row["domain"], row["repetition"])))
+    Path(args.output).resolve().parent.mkdir(parents=True, exist_ok=True)
+    write_results(rows, args.output)
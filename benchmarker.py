@@ -1,8 +1,14 @@
 import clingo
 
-from typing import List
+from typing import Callable, Dict, List, Optional
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from functools import wraps
 from json import dumps
 from pathlib import Path
+from time import time
+
+import numpy as np
 
 
 def solve(prg: clingo.Control) -> List[clingo.Symbol]:
@@ -18,6 +24,32 @@ def solve(prg: clingo.Control) -> List[clingo.Symbol]:
     return model
 
 
+def timer(benchmarker: Optional["Benchmarker"], phase: str):
+    """Measures the time of a phase (context manager, does nothing if benchmarker is None)"""
+    if benchmarker is None:
+        return nullcontext()
+    return benchmarker.timer(phase)
+
+
+def timed(phase: str):
+    """Decorator which measures the time of a method as phase (the object needs the attribute benchmarker)"""
+    def decorator(function):
+        @wraps(function)
+        def wrapper(self, *args, **kwargs):
+            with timer(self.benchmarker, phase):
+                return function(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_summary(values: List[float]) -> dict:
+    """count, total, p50, p95 and max of the values"""
+    if not values:
+        return {"count": 0, "total": 0, "p50": 0, "p95": 0, "max": 0}
+    return {"count": len(values), "total": float(np.sum(values)), "p50": float(np.percentile(values, 50)),
+            "p95": float(np.percentile(values, 95)), "max": float(np.max(values))}
+
+
 class Benchmarker(object):
     def __init__(self, strategy: str, instance: str, domain: str, result_path: str) -> None:
         self.result_path: str = result_path + "/" + strategy + "/" + domain + "/" + instance[:-3] + "/"
@@ -25,6 +57,19 @@ class Benchmarker(object):
 
         self.counter: int = 0
 
+        # the timers are aggregated in memory and written once per run (see get_summary)
+        self.get_timestep: Callable[[], int] = lambda: 0  # current timestep of the run (set by Pathfind)
+        # key: phase, value: durations (including nested phases)
+        self.phases: Dict[str, List[float]] = defaultdict(list)
+        # key: phase, value: time without nested phases (the phases add up to the run time without bookkeeping)
+        self.exclusive: Dict[str, float] = defaultdict(float)
+        # phases which are currently measured: [phase, start, time of nested phases]
+        self.stack: List[list] = []
+        # key: timestep, value: time without nested phases of each phase in the timestep
+        self.timesteps: Dict[int, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        # key: type of solving (i.e. assignment, plan, conflict), value: ground and solve times, grounded atoms, rules
+        self.solves: Dict[str, dict] = defaultdict(lambda: {"ground": [], "solve": [], "atoms": 0, "rules": 0})
+
     def output(self, stats: dict, type: str) -> None:
         file: str = self.result_path
         if type == "main":
@@ -39,7 +84,64 @@ class Benchmarker(object):
             print(dumps(stats, sort_keys=True, indent=4, separators=(',', ': ')), file=f)
         self.counter += 1
 
+    def output_timesteps(self) -> None:
+        """Saves the time of each phase per timestep (without nested phases)"""
+        with open(self.result_path + "timesteps.json", 'w+') as f:
+            print(dumps({t: dict(phases) for t, phases in sorted(self.timesteps.items())}, sort_keys=True, indent=4,
+                        separators=(',', ': ')), file=f)
+
+    @contextmanager
+    def timer(self, phase: str):
+        entry = [phase, time(), 0.0]
+        self.stack.append(entry)
+        try:
+            yield
+        finally:
+            self.stack.pop()
+            duration = time() - entry[1]
+            self.phases[phase].append(duration)
+            self.exclusive[phase] += duration - entry[2]
+            self.timesteps[self.get_timestep()][phase] += duration - entry[2]
+            if self.stack:
+                self.stack[-1][2] += duration
+
+    def ground(self, prg: clingo.Control, parts, type: str) -> None:
+        ts = time()
+        with self.timer("ground"):
+            prg.ground(parts)
+        self.solves[type]["ground"].append(time() - ts)
+
     def solve(self, prg: clingo.Control, type: str) -> List[clingo.Symbol]:
-        results: List[clingo.Symbol] = solve(prg)
-        self.output(prg.statistics, type)
+        ts = time()
+        with self.timer("solve"):
+            results: List[clingo.Symbol] = solve(prg)
+        stats = prg.statistics
+        self.add_solve(type, None, time() - ts, stats)
+        self.output(stats, type)
         return results
+
+    def add_solve(self, type: str, ground_time: Optional[float], solve_time: float, stats: dict) -> None:
+        """Saves a solved program (ground_time is None if the grounding was already saved by ground)"""
+        if ground_time is not None:
+            self.solves[type]["ground"].append(ground_time)
+        self.solves[type]["solve"].append(solve_time)
+        self.solves[type]["atoms"] += int(stats["problem"]["lp"]["atoms"])
+        self.solves[type]["rules"] += int(stats["problem"]["lp"]["rules"])
+
+    def get_summary(self, run_time: float) -> dict:
+        """Summary of the timers of the run:
+        phases: count, total, p50, p95 and max of the durations and the time without nested phases (self)
+        solves: per type of solving the solving times (count, total, p50, p95, max), the total grounding time
+        and the number of grounded atoms and rules
+        bookkeeping: run time which is not in any phase
+        """
+        phases = {}
+        for phase, durations in self.phases.items():
+            phases[phase] = get_summary(durations)
+            phases[phase]["self"] = self.exclusive[phase]
+        solves = {}
+        for type, values in self.solves.items():
+            solves[type] = get_summary(values["solve"])
+            solves[type].update({"ground": float(np.sum(values["ground"])), "atoms": values["atoms"],
+                                 "rules": values["rules"]})
+        return {"phases": phases, "solves": solves, "bookkeeping": run_time - sum(self.exclusive.values())}
@@ -0,0 +1,136 @@
+import clingo
+
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+
+def find_conflicts(robots: List[Tuple[int, List[int], Optional[clingo.Symbol]]]) -> List[clingo.Symbol]:
+    """Native implementation of encodings/conflicts.lp
+    robots contains for every robot its id, its position and its next action (move/3, pickup/2, deliver/4, putdown/2,
+    wait/1 or None if the robot has no next action)
+    Returns the conflict/3, conflictW/3, conflictWO/3, conflictWOConf/3 and swap/2 atoms (in this order, each sorted)
+    """
+    position: Dict[int, Tuple[int, int]] = {}
+    robots_at: Dict[Tuple[int, int], List[int]] = defaultdict(list)  # robots on a position
+    predicted: Dict[int, Tuple[int, int]] = {}  # predicted position of all moving robots
+    robots_to: Dict[Tuple[int, int], List[int]] = defaultdict(list)  # robots which will move onto a position
+    waits: Set[int] = set()  # robots which wait or perform an action (pickup, deliver, putdown)
+
+    for rid, pos, action in robots:
+        position[rid] = (pos[0], pos[1])
+        robots_at[position[rid]].append(rid)
+        if action is None:
+            continue
+        if action.name == "move":
+            predicted[rid] = (pos[0] + action.arguments[0].arguments[0].number,
+                              pos[1] + action.arguments[0].arguments[1].number)
+            robots_to[predicted[rid]].append(rid)
+        elif action.name in ["wait", "pickup", "deliver", "putdown"]:
+            waits.add(rid)
+
+    # two robots want to move onto the same position
+    conflict = set()
+    for pos, rids in robots_to.items():
+        for r1 in rids:
+            for r2 in rids:
+                if r1 < r2:
+                    conflict.add((r1, r2, pos))
+
+    # two robots want to move onto each others position
+    swap = set()
+    for r1, pos in predicted.items():
+        for r2 in robots_at[pos]:
+            if r1 < r2 and predicted.get(r2) == position[r1]:
+                swap.add((r1, r2))
+
+    # robot wants to move onto the position of a waiting robot
+    conflict_w = set()
+    for r1, pos in predicted.items():
+        for r2 in robots_at[pos]:
+            if r2 in waits:
+                conflict_w.add((r1, r2, pos))
+
+    # robots which have to wait because of a conflict cause new conflicts for robots moving onto their position
+    conflict_wo = waits_out([r1 for r1, _, _ in conflict_w], position, robots_to)
+    conflict_wo_conf = waits_out([r1 for r1, _, _ in conflict], position, robots_to)
+
+    conflicts = []
+    for name, atoms in [("conflict", conflict), ("conflictW", conflict_w), ("conflictWO", conflict_wo),
+                        ("conflictWOConf", conflict_wo_conf)]:
+        for r1, r2, pos in sorted(atoms):
+            conflicts.append(clingo.Function(name, [r1, r2, pos]))
+    for r1, r2 in sorted(swap):
+        conflicts.append(clingo.Function("swap", [r1, r2]))
+    return conflicts
+
+
+def waits_out(waiting: List[int], position: Dict[int, Tuple[int, int]],
+              robots_to: Dict[Tuple[int, int], List[int]]) -> Set[Tuple[int, int, Tuple[int, int]]]:
+    """Computes the transitive conflicts caused by the robots in waiting
+    (conflictWO for robots waiting because of conflictW, conflictWOConf for robots waiting because of conflict)"""
+    atoms = set()
+    done = set(waiting)
+    queue = list(done)
+    while queue:
+        r2 = queue.pop()
+        for r1 in robots_to[position[r2]]:
+            atoms.add((r1, r2, position[r2]))
+            if r1 not in done:
+                done.add(r1)
+                queue.append(r1)
+    return atoms
+
+
+def find_conflicts_ahead(ids: List[int], x: np.ndarray, y: np.ndarray) -> List[tuple]:
+    """Finds the conflicts of the next timesteps in one pass over the positions of all robots
+    x, y: positions of the robots (row i: robot ids[i], column s: position after s timesteps, column 0: current position)
+    Returns the earliest conflict of every pair of robots as (timestep, r1, r2, name, position), sorted by timestep:
+    conflict (both robots move onto the same position), conflictW (r1 moves onto the position of r2 which doesn't move)
+    and swap (the robots move onto each others position, the position is the one of r2)
+    """
+    n, width = x.shape
+    if n < 2 or width < 2:
+        return []
+    # every position is one number, every timestep a range of numbers
+    size = int(y.max()) + 1
+    cells = x.astype(np.int64) * size + y
+    count = int(cells.max()) + 1
+    moved = cells[:, 1:] != cells[:, :-1]
+    found = []
+
+    # vertex conflicts: robots on the same position at the same timestep
+    keys = (cells[:, 1:] + np.arange(1, width) * count).ravel()
+    _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    members = np.nonzero(counts[inverse] > 1)[0]
+    members = members[np.argsort(inverse[members], kind="stable")]
+    for group in np.split(members, np.nonzero(np.diff(inverse[members]))[0] + 1) if len(members) else []:
+        robots, steps = np.divmod(group, width - 1)
+        step = int(steps[0]) + 1
+        pos = (int(x[robots[0], step]), int(y[robots[0], step]))
+        for a in robots:
+            for b in robots:
+                if moved[a, step - 1] and moved[b, step - 1] and ids[a] < ids[b]:
+                    found.append((step, ids[a], ids[b], "conflict", pos))
+                elif moved[a, step - 1] and not moved[b, step - 1]:
+                    found.append((step, ids[a], ids[b], "conflictW", pos))
+
+    # swaps: a move (timestep, from, to) matched with the reversed move (timestep, to, from) of another robot
+    robots, steps = np.nonzero(moved)
+    source, target = cells[robots, steps], cells[robots, steps + 1]
+    forward = (steps * count + source) * count + target
+    backward = (steps * count + target) * count + source
+    order = np.argsort(forward, kind="stable")
+    first = np.searchsorted(forward[order], backward, side="left")
+    last = np.searchsorted(forward[order], backward, side="right")
+    for i in np.nonzero(last > first)[0]:
+        for j in order[first[i]:last[i]]:
+            a, b = robots[i], robots[j]
+            if ids[a] < ids[b]:
+                found.append((int(steps[i]) + 1, ids[a], ids[b], "swap", (int(x[b, steps[i]]), int(y[b, steps[i]]))))
+
+    earliest = {}
+    for conflict in sorted(found):
+        earliest.setdefault((min(conflict[1:3]), max(conflict[1:3])), conflict)
+    return sorted(earliest.values())
@@ -0,0 +1,71 @@
+from instance import Instance
+
+from typing import Dict, List, Optional, Set, Tuple
+
+import clingo
+
+# directions in the order of dir/1 in crossroad.lp
+DIRECTIONS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+
+class CrossingTable(object):
+    def __init__(self, instance: Instance) -> None:
+        """Native implementation of encodings/crossroad.lp
+        The crossings (highways with at least 3 neighbouring highways) are computed once per instance,
+        for every start position the reachable crossings are computed once with a BFS over the highways
+        and saved with their distance and path (only crossings which are reachable by a shortest path)
+        """
+        # highways and the start positions of the robots (as in crossroad.lp)
+        self.highways: Set[Tuple[int, int]] = {(x, y) for _, x, y in instance.highways}
+        self.highways.update((x, y) for _, x, y in instance.robots)
+        self.crossings: Set[Tuple[int, int]] = {(x, y) for x, y in self.highways
+                                                if sum((x + dx, y + dy) in self.highways
+                                                       for dx, dy in DIRECTIONS) >= 3}
+        # key: start, value: [(distance, crossing, path as list of directions)] sorted by distance
+        self.table: Dict[Tuple[int, int], List[Tuple[int, Tuple[int, int], List[Tuple[int, int]]]]] = {}
+
+    def get_crossings(self, start: Tuple[int, int]) -> List[Tuple[int, Tuple[int, int], List[Tuple[int, int]]]]:
+        if start in self.table:
+            return self.table[start]
+
+        # BFS over the highways, a crossing is reachable if its distance is the manhattan distance
+        parent: Dict[Tuple[int, int], Optional[Tuple[Tuple[int, int], Tuple[int, int]]]] = {start: None}
+        distance = {start: 0}
+        # robots can only move from highways, so no crossing is reachable from other positions
+        queue = [start] if start in self.highways else []
+        for node in queue:
+            for dx, dy in DIRECTIONS:
+                neighbour = (node[0] + dx, node[1] + dy)
+                if neighbour in self.highways and neighbour not in distance:
+                    distance[neighbour] = distance[node] + 1
+                    parent[neighbour] = (node, (dx, dy))
+                    queue.append(neighbour)
+
+        crossings = []
+        for node in queue:
+            if node in self.crossings and distance[node] == abs(node[0] - start[0]) + abs(node[1] - start[1]):
+                path = []
+                current = node
+                while parent[current] is not None:
+                    current, direction = parent[current]
+                    path.append(direction)
+                path.reverse()
+                crossings.append((distance[node], node, path))
+        self.table[start] = crossings
+        return crossings
+
+    def find_crossroad(self, rid: int, start: List[int],
+                       blocked: List[Tuple[int, int]]) -> Tuple[int, List[clingo.Symbol]]:
+        """Returns the distance to the nearest crossing which is not blocked and the moves to the crossing
+        followed by all moves off the crossing (same atoms as crossroad.lp), (-1, []) if there is no crossing
+        """
+        blocked = {(cross[0], cross[1]) for cross in blocked}
+        for length, crossing, path in self.get_crossings((start[0], start[1])):
+            if crossing in blocked:
+                continue
+            model = [clingo.Function("move", [direction, rid, t + 1]) for t, direction in enumerate(path)]
+            for dx, dy in DIRECTIONS:
+                if (crossing[0] + dx, crossing[1] + dy) in self.highways:
+                    model.append(clingo.Function("move", [(dx, dy), rid, length + 1]))
+            return length, model
+        return -1, []
@@ -0,0 +1,39 @@
+from time import time
+from typing import Iterable, List
+
+import clingo
+
+
+class FactBuilder(object):
+    def __init__(self, mode: str = "backend") -> None:
+        """Adds facts (given as clingo symbols) to a program
+        mode: backend (the atoms are added with the backend of the program, nothing is printed or parsed)
+        or text (the facts are printed and parsed as a string program)
+        The time spent on adding the facts is measured to compare both modes
+        """
+        self.mode: str = mode
+        self.time: float = 0  # total time spent on adding facts
+        self.facts: int = 0  # number of facts which were added
+        self.programs: int = 0  # number of calls of add (one per program)
+
+    def add(self, prg: clingo.Control, facts: Iterable[clingo.Symbol]) -> None:
+        ts = time()
+        facts = list(facts)
+        if self.mode == "text":
+            prg.add("base", [], to_text(facts))
+        else:
+            with prg.backend() as backend:
+                for atom in facts:
+                    backend.add_rule([backend.add_atom(atom)])
+        self.time += time() - ts
+        self.facts += len(facts)
+        self.programs += 1
+
+    def get_stats(self) -> dict:
+        return {"fact_time": self.time, "facts": self.facts, "fact_programs": self.programs,
+                "fact_time_per_program": self.time / self.programs if self.programs else 0}
+
+
+def to_text(facts: List[clingo.Symbol]) -> str:
+    """Returns the facts as a string program"""
+    return "".join(str(atom) + "." for atom in facts)
@@ -0,0 +1,77 @@
+from instance import Instance
+from planner import GraphDistances
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class ShelfChooser(object):
+    def __init__(self, instance: Instance, highways: bool, distance: str) -> None:
+        """Chooses the shelf for the order of a single robot without solving goals.lp:
+        the available shelf holding the product which minimizes the distance start -> shelf -> station -> shelf
+        distance: manhattan (as in goals.lp) or graph (shortest paths on highways in the nextto/3 graph)
+        """
+        self.positions: Dict[int, Tuple[int, int]] = {id: (x, y) for id, x, y in instance.shelves}
+        self.stations: Dict[int, Tuple[int, int]] = {id: (x, y) for id, x, y in instance.pickingstations}
+
+        # shelves holding each product (in the order of the instance) and their positions
+        # key: product, value: (array of shelf ids, array of shelf positions)
+        shelves: Dict[int, List[int]] = {}
+        for product, shelf in instance.products:
+            if shelf in self.positions and shelf not in shelves.setdefault(product, []):
+                shelves[product].append(shelf)
+        self.products: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        for product, ids in shelves.items():
+            self.products[product] = (np.array(ids, dtype=int),
+                                      np.array([self.positions[shelf] for shelf in ids], dtype=int).reshape(-1, 2))
+
+        self.graph: Optional[GraphDistances] = GraphDistances(instance, highways) if distance == "graph" else None
+
+        self.choices: int = 0
+
+    def choose(self, start: List[int], order: List[int],
+               available: List[int]) -> Optional[Tuple[int, Tuple[int, int], Tuple[int, int]]]:
+        """Returns (shelf, position of the shelf, position of the station) for the order [id,product,station]
+        None if no shelf is available (goals.lp is unsatisfiable)
+        Ties are broken by the order of the shelves in the instance
+        """
+        if order[1] not in self.products or order[2] not in self.stations:
+            return None
+        ids, positions = self.products[order[1]]
+        mask = np.isin(ids, available)
+        if not mask.any():
+            return None
+        ids, positions = ids[mask], positions[mask]
+        station = self.stations[order[2]]
+
+        if self.graph is None:
+            costs = self.get_manhattan(start, positions, station)
+        else:
+            costs = self.get_graph(start, positions, station)
+            if np.isinf(costs).all():
+                # no shelf is reachable on highways, the planner can not find a plan either way
+                costs = self.get_manhattan(start, positions, station)
+
+        self.choices += 1
+        index = int(np.argmin(costs))
+        return int(ids[index]), tuple(int(c) for c in positions[index]), station
+
+    @staticmethod
+    def get_manhattan(start: List[int], positions: np.ndarray, station: Tuple[int, int]) -> np.ndarray:
+        # start -> shelf, shelf -> station and station -> shelf
+        return np.abs(positions - np.array(start)).sum(axis=1) + 2 * np.abs(positions - np.array(station)).sum(axis=1)
+
+    def get_graph(self, start: List[int], positions: np.ndarray, station: Tuple[int, int]) -> np.ndarray:
+        costs = np.empty(len(positions))
+        start = tuple(start)
+        for i, position in enumerate(positions):
+            shelf = (int(position[0]), int(position[1]))
+            goal_nodes = tuple(sorted([shelf, station]))
+            to_shelf = self.graph.get(shelf, goal_nodes)
+            to_station = self.graph.get(station, goal_nodes)
+            if start in to_shelf and shelf in to_station and station in to_shelf:
+                costs[i] = to_shelf[start] + to_station[shelf] + to_shelf[station]
+            else:
+                costs[i] = np.inf
+        return costs
@@ -0,0 +1,131 @@
+from benchmarker import solve
+
+import os
+import pickle
+from hashlib import sha1
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import clingo
+
+# version of the on-disk cache format, cached files of other versions are ignored
+CACHE_VERSION = 1
+
+# compiled instances of this process, key: hash of the instance file
+instances: Dict[str, "Instance"] = {}
+
+
+class Instance(object):
+    def __init__(self, facts: List[clingo.Symbol], tables: Optional[dict] = None) -> None:
+        """Compiled representation of an instance:
+        all facts of the instance (init/2, nextto/3, ...) as symbols
+        and the tables which are needed by the strategies (computed from the facts if not given)
+        """
+        self.facts: List[clingo.Symbol] = facts
+
+        if tables is not None:
+            self.__dict__.update(tables)
+        else:
+            self.parse_facts()
+
+    def parse_facts(self) -> None:
+        """Computes the tables from the init/2 facts"""
+        self.nodes = []  # [[id,x,y]]
+        self.highways = []  # [[id,x,y]]
+        self.robots = []  # [[id,x,y]]
+        self.orders = []  # [[id,product,station]]
+        self.pickingstations = []  # [[id,x,y]]
+        self.shelves = []  # [[id,x,y]]
+        self.products = []  # [[id,shelf]]
+
+        # the atoms which specify the product for an order and the atom specifying the pickingstation
+        # are separate, the temporary dict is needed to merge both values later
+        order_stations = {}  # key: order id, value: pickingstation id
+        for atom in self.facts:
+            if atom.name == "init":
+                name = atom.arguments[0].arguments[0].name
+                id = atom.arguments[0].arguments[1].number
+                if name == "node":
+                    x = atom.arguments[1].arguments[1].arguments[0].number
+                    y = atom.arguments[1].arguments[1].arguments[1].number
+                    self.nodes.append([id, x, y])
+                elif name == "highway":
+                    x = atom.arguments[1].arguments[1].arguments[0].number
+                    y = atom.arguments[1].arguments[1].arguments[1].number
+                    self.highways.append([id, x, y])
+                elif name == "robot":
+                    x = atom.arguments[1].arguments[1].arguments[0].number
+                    y = atom.arguments[1].arguments[1].arguments[1].number
+                    self.robots.append([id, x, y])
+                elif name == "order":
+                    if atom.arguments[1].arguments[0].name == "line":
+                        product = atom.arguments[1].arguments[1].arguments[0].number
+                        self.orders.append([id, product])
+                    else:
+                        station = atom.arguments[1].arguments[1].number
+                        order_stations[id] = station
+                elif name == "pickingStation":
+                    x = atom.arguments[1].arguments[1].arguments[0].number
+                    y = atom.arguments[1].arguments[1].arguments[1].number
+                    self.pickingstations.append([id, x, y])
+                elif name == "product":
+                    shelf = atom.arguments[1].arguments[1].arguments[0].number
+                    # amount
+                    self.products.append([id, shelf])
+                elif name == "shelf":
+                    x = atom.arguments[1].arguments[1].arguments[0].number
+                    y = atom.arguments[1].arguments[1].arguments[1].number
+                    self.shelves.append([id, x, y])
+
+        # assign pickingstations to orders
+        for order in self.orders:
+            order.append(order_stations[order[0]])
+
+    def get_tables(self) -> dict:
+        return {"nodes": self.nodes, "highways": self.highways, "robots": self.robots, "orders": self.orders,
+                "pickingstations": self.pickingstations, "shelves": self.shelves, "products": self.products}
+
+    def load(self, prg: clingo.Control) -> None:
+        """Adds all facts of the instance to prg
+        (replaces prg.load(instance), the facts are passed as symbols so the instance is not parsed again)
+        """
+        with prg.backend() as backend:
+            for fact in self.facts:
+                backend.add_rule([backend.add_atom(fact)])
+
+
+def compile_instance(instance: str, cache_path: Optional[str], clingo_arguments: List[str]) -> Instance:
+    """Returns the compiled instance
+    Instances are cached in memory and in cache_path (if not None), the key is the hash of the file content
+    """
+    content = Path(instance).read_bytes()
+    key = sha1(content).hexdigest()
+    if key in instances:
+        return instances[key]
+
+    file = None
+    if cache_path is not None:
+        file = Path(cache_path) / ("instance-" + str(CACHE_VERSION) + "-" + key + ".pickle")
+        if file.is_file():
+            with open(file, "rb") as f:
+                facts, tables = pickle.load(f)
+            # parsing single terms is faster than building the symbols with clingo.Function
+            instances[key] = Instance([clingo.parse_term(fact) for fact in facts], tables)
+            return instances[key]
+
+    prg = clingo.Control(clingo_arguments)
+    prg.load(instance)
+    prg.ground([("base", [])])
+    instances[key] = Instance(solve(prg))
+
+    if file is not None:
+        file.parent.mkdir(parents=True, exist_ok=True)
+        # write to a temporary file first, so that concurrent runs never read a partial file
+        tmp = file.with_suffix(".tmp" + str(os.getpid()))
+        with open(tmp, "wb") as f:
+            pickle.dump(([str(fact) for fact in instances[key].facts], instances[key].get_tables()), f,
+                        pickle.HIGHEST_PROTOCOL)
+        tmp.replace(file)
+
+    return instances[key]
+
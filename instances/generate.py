@@ -0,0 +1,240 @@
+import argparse
+import random
+import sys
+from typing import List, Set, Tuple
+
+# directions of nextto/3
+DIRECTIONS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+# rows above the storage area: picking stations (1) and two highway rows (2, 3)
+TOP_ROWS = 3
+
+Cell = Tuple[int, int]
+
+
+class Layout(object):
+    def __init__(self, width: int, height: int, block_width: int, block_height: int, robots: int,
+                 stations: int) -> None:
+        """Layout of a warehouse floor (same structure as the instances in original/):
+        picking stations in the first row, followed by two highway rows, the storage blocks in a grid separated by
+        highways (one column at the left, one aisle after each block) and the start area of the robots at the bottom
+        Columns and rows which are left over widen the blocks and the start area, so the blocks always end at the
+        right edge and directly above the start area (as needed by createTraffic.lp)
+        The robots start on every other cell of the start area (like a checkerboard), so every robot can leave its
+        start position
+        """
+        self.width: int = width
+        self.height: int = height
+
+        start_rows = max(1, -(-robots // (width // 2)))
+        blocks_x = (width - 1) // (block_width + 1)
+        blocks_y = (height - TOP_ROWS - start_rows) // (block_height + 1)
+        if blocks_x < 1 or blocks_y < 1:
+            raise ValueError("grid of " + str(width) + "x" + str(height) + " is too small for a storage block of " +
+                             str(block_width) + "x" + str(block_height) + " and " + str(robots) + " robots")
+
+        # vertical aisles (x) after each block, the blocks are widened from the left by the columns left over
+        extra = (width - 1) - blocks_x * (block_width + 1)
+        self.columns: List[int] = []
+        x = 1
+        for i in range(blocks_x):
+            x += block_width + (1 if i < extra else 0) + 1
+            self.columns.append(x)
+        # horizontal aisles (y) after each block, the rows left over belong to the start area
+        self.rows: List[int] = [TOP_ROWS + (i + 1) * (block_height + 1) for i in range(blocks_y)]
+        self.start_rows: List[int] = list(range(self.rows[-1] + 1, height + 1))
+
+        self.storage: Set[Cell] = set()
+        for x in range(2, width + 1):
+            for y in range(TOP_ROWS + 1, self.rows[-1]):
+                if x not in self.columns and y not in self.rows:
+                    self.storage.add((x, y))
+
+        # picking stations evenly spread over the first row (above the blocks, not at the aisles)
+        candidates = [x for x in range(2, width + 1) if x not in self.columns]
+        if stations > len(candidates):
+            raise ValueError("only " + str(len(candidates)) + " picking stations fit into the first row")
+        self.stations: List[Cell] = [(candidates[(2 * i + 1) * len(candidates) // (2 * stations)], 1)
+                                     for i in range(stations)]
+
+        # the neighbours of the start cells (left, right and above) are never start cells
+        self.start: List[Cell] = [(x, y) for y in reversed(self.start_rows) for x in range(1, width + 1)
+                                  if (x + y) % 2 == height % 2]
+        station_cells = set(self.stations)
+        self.highways: Set[Cell] = {(x, y) for x in range(1, width + 1) for y in range(1, height + 1)
+                                    if (x, y) not in self.storage and (x, y) not in station_cells}
+
+    def get_id(self, cell: Cell) -> int:
+        """Id of the node (and highway) at cell (numbered row by row like the asprilo generator)"""
+        return (cell[1] - 1) * self.width + cell[0]
+
+    def get_nodes(self) -> List[Cell]:
+        return sorted(((x, y) for x in range(1, self.width + 1) for y in range(1, self.height + 1)), key=self.get_id)
+
+    def get_shelf_cells(self) -> List[Cell]:
+        """Storage cells next to a highway (the shelves on the other cells couldn't be reached)"""
+        return [cell for cell in self.get_nodes() if cell in self.storage and
+                any((cell[0] + dx, cell[1] + dy) in self.highways for dx, dy in DIRECTIONS)]
+
+
+def get_graph_edges(layout: Layout) -> Set[Tuple[Cell, Cell]]:
+    """Edges of createGraph.lp: all neighbouring nodes of which at least one is a highway are connected both ways"""
+    edges = set()
+    for x, y in layout.get_nodes():
+        for dx, dy in DIRECTIONS:
+            other = (x + dx, y + dy)
+            if 1 <= other[0] <= layout.width and 1 <= other[1] <= layout.height and \
+                    ((x, y) in layout.highways or other in layout.highways):
+                edges.add(((x, y), other))
+    return edges
+
+
+def get_traffic_edges(layout: Layout, robots: List[Cell]) -> Set[Tuple[Cell, Cell]]:
+    """Edges of createTraffic.lp (one-way lanes):
+    row 2 goes left, row 3 right, column 1 up, the vertical aisles alternate between down and up and the horizontal
+    aisles below the blocks and the rows of the start area alternate between right and left,
+    the columns alternate between up and down to connect the rows 2 and 3,
+    the first row consists of partial lanes between the vertical aisles (alternating between right and left),
+    the storage cells are connected both ways to the neighbouring highways
+    and the robots can move up from their start positions
+    """
+    edges = set()
+    highways = layout.highways | set(robots)
+
+    def add_row(y: int, dx: int) -> None:
+        for x in range(1, layout.width):
+            if (x, y) in highways and (x + 1, y) in highways:
+                edges.add(((x, y), (x + 1, y)) if dx == 1 else ((x + 1, y), (x, y)))
+
+    def add_column(x: int, dy: int) -> None:
+        for y in range(1, layout.height):
+            if (x, y) in highways and (x, y + 1) in highways:
+                edges.add(((x, y), (x, y + 1)) if dy == 1 else ((x, y + 1), (x, y)))
+
+    add_row(2, -1)
+    add_row(3, 1)
+    for n, y in enumerate(layout.rows + layout.start_rows):
+        add_row(y, 1 if n % 2 == 0 else -1)
+    add_column(1, -1)
+    for n, x in enumerate(layout.columns):
+        add_column(x, 1 if n % 2 == 0 else -1)
+
+    # the rows 2 and 3 are connected alternating up and down, starting from the vertical lanes
+    up, down = False, False
+    for x in range(1, layout.width + 1):
+        up, down = ((x, 3), (x, 2)) in edges or down, ((x, 2), (x, 3)) in edges or up
+        if up:
+            edges.add(((x, 3), (x, 2)))
+        if down:
+            edges.add(((x, 2), (x, 3)))
+
+    for cell in layout.storage:
+        for dx, dy in DIRECTIONS:
+            other = (cell[0] + dx, cell[1] + dy)
+            if other in highways:
+                edges.add((cell, other))
+                edges.add((other, cell))
+
+    for x, y in robots:
+        if (x, y - 1) in highways:
+            edges.add(((x, y), (x, y - 1)))
+
+    # partial lanes of the first row between the vertical lanes
+    bounds = [1] + layout.columns
+    for n in range(len(bounds) - 1):
+        for x in range(bounds[n], bounds[n + 1]):
+            edges.add(((x, 1), (x + 1, 1)) if n % 2 == 0 else ((x + 1, 1), (x, 1)))
+    return edges
+
+
+def generate(width: int, height: int, block_width: int, block_height: int, robots: int, stations: int,
+             shelves: int, products: int, orders: int, seed: int, traffic: bool) -> List[str]:
+    """Returns the facts (init/2 and nextto/3) of a random instance
+    shelves: number of shelves (-1: a shelf on every reachable storage cell)
+    products: number of products (-1: one product per shelf), each product is on one to three shelves
+    orders: number of orders (-1: one order per robot), each order has one line with a random product
+    """
+    rng = random.Random(seed)
+    layout = Layout(width, height, block_width, block_height, robots, stations)
+
+    shelf_cells = layout.get_shelf_cells()
+    if shelves < 0:
+        shelves = len(shelf_cells)
+    if shelves > len(shelf_cells):
+        raise ValueError("only " + str(len(shelf_cells)) + " shelves fit into the storage blocks")
+    shelf_cells = sorted(rng.sample(shelf_cells, shelves), key=layout.get_id)
+    if products < 0:
+        products = shelves
+    if shelves < 1 or products < 1:
+        raise ValueError("the instance needs at least one shelf and one product")
+    if orders < 0:
+        orders = robots
+    robot_cells = sorted(rng.sample(layout.start, robots), key=layout.get_id)
+
+    facts = []
+    for cell in layout.get_nodes():
+        facts.append("init(object(node," + str(layout.get_id(cell)) + "),value(at,(" + str(cell[0]) + "," +
+                     str(cell[1]) + ")))")
+    for cell in layout.get_nodes():
+        if cell in layout.highways:
+            facts.append("init(object(highway," + str(layout.get_id(cell)) + "),value(at,(" + str(cell[0]) + "," +
+                         str(cell[1]) + ")))")
+    for i, cell in enumerate(layout.stations):
+        facts.append("init(object(pickingStation," + str(i + 1) + "),value(at,(" + str(cell[0]) + "," +
+                     str(cell[1]) + ")))")
+    for i, cell in enumerate(shelf_cells):
+        facts.append("init(object(shelf," + str(i + 1) + "),value(at,(" + str(cell[0]) + "," + str(cell[1]) + ")))")
+    for product in range(1, products + 1):
+        for shelf in sorted(rng.sample(range(1, shelves + 1), min(shelves, rng.randint(1, 3)))):
+            facts.append("init(object(product," + str(product) + "),value(on,(" + str(shelf) + "," +
+                         str(rng.randint(1, 10)) + ")))")
+    for i, cell in enumerate(robot_cells):
+        facts.append("init(object(robot," + str(i + 1) + "),value(at,(" + str(cell[0]) + "," + str(cell[1]) + ")))")
+    for order in range(1, orders + 1):
+        facts.append("init(object(order," + str(order) + "),value(pickingStation," +
+                     str(rng.randint(1, stations)) + "))")
+        facts.append("init(object(order," + str(order) + "),value(line,(" + str(rng.randint(1, products)) + ",1)))")
+
+    edges = get_traffic_edges(layout, robot_cells) if traffic else get_graph_edges(layout)
+    # a robot whose neighbours are all occupied could never move
+    occupied = set(robot_cells)
+    exits = {a for a, b in edges if a in occupied and b not in occupied}
+    assert exits == occupied, "robots without a free neighbour: " + str(sorted(occupied - exits, key=layout.get_id))
+    for a, b in sorted(edges, key=lambda edge: (layout.get_id(edge[0]), layout.get_id(edge[1]))):
+        facts.append("nextto((" + str(a[0]) + "," + str(a[1]) + "),(" + str(b[0] - a[0]) + "," + str(b[1] - a[1]) +
+                     "),(" + str(b[0]) + "," + str(b[1]) + "))")
+    return facts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generates a random warehouse instance with init/2 and nextto/3 "
+                                                 "facts (without clingo, the same graphs as createGraph.lp and, "
+                                                 "for a start area of one row, createTraffic.lp)")
+    parser.add_argument("width", help="number of columns of the grid", type=int)
+    parser.add_argument("height", help="number of rows of the grid", type=int)
+    parser.add_argument("-r", "--robots", help="number of robots (default: 6)", default=6, type=int)
+    parser.add_argument("-s", "--stations", help="number of picking stations (default: 3)", default=3, type=int)
+    parser.add_argument("--shelves", help="number of shelves (default: a shelf on every storage cell)", default=-1,
+                        type=int)
+    parser.add_argument("-p", "--products", help="number of products (default: one per shelf)", default=-1, type=int)
+    parser.add_argument("-O", "--orders", help="number of orders (default: one per robot)", default=-1, type=int)
+    parser.add_argument("--block-width", help="number of columns of a storage block (default: 4)", default=4,
+                        type=int)
+    parser.add_argument("--block-height", help="number of rows of a storage block (default: 2)", default=2, type=int)
+    parser.add_argument("-t", "--traffic", help="one-way lanes for the traffic strategy (as createTraffic.lp, "
+                                                "but a start area of more than one row gets alternating lanes) "
+                                                "instead of highways in both directions (as createGraph.lp)",
+                        default=False, action="store_true")
+    parser.add_argument("--seed", help="seed of the random placement (default: 0)", default=0, type=int)
+    parser.add_argument("-o", "--output", help="instance file (default: stdout)", default=None, type=str)
+    args = parser.parse_args()
+
+    try:
+        facts = generate(args.width, args.height, args.block_width, args.block_height, args.robots, args.stations,
+                         args.shelves, args.products, args.orders, args.seed, args.traffic)
+    except ValueError as e:
+        parser.error(str(e))
+    f = open(args.output, "w") if args.output is not None else sys.stdout
+    print("% generated by generate.py " + " ".join(sys.argv[1:]), file=f)
+    print("".join(fact + ".\n" for fact in facts), end="", file=f)
+    if args.output is not None:
+        f.close()
@@ -0,0 +1,198 @@
+from plan import ACTIONS, NAMES
+
+import argparse
+import gzip
+import sys
+from array import array
+from importlib.util import find_spec
+from typing import IO, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# compact trace: magic followed by blocks of
+# number of bytes of the inits, number of actions, inits (text), columns of the actions
+TRACE_MAGIC = b"ASPRILOTRACE1\n"
+# columns of the actions with the type in the trace (little endian)
+TRACE_COLUMNS = [("robot", "<i4"), ("t", "<i4"), ("code", "<i1"), ("arg0", "<i4"), ("arg1", "<i4")]
+
+
+def open_file(path: str, mode: str) -> IO:
+    """Opens path, files ending with .gz or .zst are compressed"""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode)
+    if path.endswith(".zst"):
+        # optional dependency, only needed for zstd compressed files
+        import zstandard
+        return zstandard.open(path, mode)
+    return open(path, mode)
+
+
+def check_file(path: str) -> Optional[str]:
+    """Returns an error message if the optional module needed to open path is not installed (None otherwise)"""
+    if path.endswith(".zst") and find_spec("zstandard") is None:
+        return "the file " + path + " needs the python module zstandard (pip install zstandard)"
+    return None
+
+
+def format_action(rid: int, name: str, args: List[int], t: int) -> str:
+    """Returns the action as occurs/3 atom in the asprilo format"""
+    txt = "occurs(object(robot," + str(rid) + "),action(" + name + ",("
+    if (name == "move") or (name == "deliver"):
+        txt += str(args[0]) + "," + str(args[1])
+    txt += "))," + str(t) + ")."
+    return txt
+
+
+class Writer(object):
+    """Output of the inits and actions of a run (does nothing, the subclasses write the output)"""
+
+    def init(self, atom: str) -> None:
+        pass
+
+    def action(self, rid: int, name: str, args: List[int], t: int) -> None:
+        pass
+
+    def actions(self, actions: List[Tuple[int, str, List[int], int]]) -> None:
+        """Several actions (robot, name, arguments, timestep) at once"""
+        for rid, name, args, t in actions:
+            self.action(rid, name, args, t)
+
+    def close(self) -> None:
+        pass
+
+
+class TextWriter(Writer):
+    def __init__(self, stream: IO[str], close_stream: bool = False, buffer_size: int = 4096) -> None:
+        """Writes the output as text in the asprilo format, buffer_size lines are written at once"""
+        self.stream: IO[str] = stream
+        self.close_stream: bool = close_stream
+        self.buffer_size: int = buffer_size
+        self.lines: List[str] = []
+
+    def init(self, atom: str) -> None:
+        self.write(atom + ".")
+
+    def action(self, rid: int, name: str, args: List[int], t: int) -> None:
+        self.write(format_action(rid, name, args, t))
+
+    def actions(self, actions: List[Tuple[int, str, List[int], int]]) -> None:
+        self.lines += [format_action(rid, name, args, t) for rid, name, args, t in actions]
+        if len(self.lines) >= self.buffer_size:
+            self.flush()
+
+    def write(self, line: str) -> None:
+        self.lines.append(line)
+        if len(self.lines) >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.lines:
+            self.stream.write("\n".join(self.lines) + "\n")
+            self.lines = []
+        self.stream.flush()
+
+    def close(self) -> None:
+        self.flush()
+        if self.close_stream:
+            self.stream.close()
+
+
+class TraceWriter(Writer):
+    def __init__(self, path: str, buffer_size: int = 65536) -> None:
+        """Writes the output as compact trace (converted back to text by read_trace / python output.py)
+        The inits are saved as text, the actions in columns (robot, timestep, action code, arguments)
+        A block is written every buffer_size actions, so the trace only holds the actions since the last block
+        """
+        self.file: IO[bytes] = open_file(path, "wb")
+        self.file.write(TRACE_MAGIC)
+        self.buffer_size: int = buffer_size
+        self.inits: List[str] = []
+        self.clear()
+
+    def clear(self) -> None:
+        self.inits = []
+        self.columns = {"robot": array("i"), "t": array("i"), "code": array("b"), "arg0": array("i"),
+                        "arg1": array("i")}
+
+    def init(self, atom: str) -> None:
+        self.inits.append(atom)
+
+    def action(self, rid: int, name: str, args: List[int], t: int) -> None:
+        self.columns["robot"].append(rid)
+        self.columns["t"].append(t)
+        self.columns["code"].append(ACTIONS[name])
+        self.columns["arg0"].append(args[0] if len(args) > 0 else 0)
+        self.columns["arg1"].append(args[1] if len(args) > 1 else 0)
+        if len(self.columns["t"]) >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes the inits and actions since the last block as a new block"""
+        if self.inits or len(self.columns["t"]):
+            inits = "\n".join(self.inits).encode()
+            self.file.write(np.array([len(inits), len(self.columns["t"])], dtype="<u8").tobytes())
+            self.file.write(inits)
+            for column, dtype in TRACE_COLUMNS:
+                self.file.write(np.asarray(self.columns[column], dtype=dtype).tobytes())
+            self.clear()
+        self.file.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self.file.close()
+
+
+def get_writer(path: Optional[str]) -> Writer:
+    """Returns the writer for the output file (stdout if path is None)
+    Files with .trace in the name (e.g. run.trace.gz) are compact traces, all other files are text"""
+    if path is None:
+        return TextWriter(sys.stdout)
+    if ".trace" in path:
+        return TraceWriter(path)
+    return TextWriter(open_file(path, "wt"), True)
+
+
+def read_trace(path: str) -> Tuple[List[str], Iterator[Tuple[int, str, List[int], int]]]:
+    """Returns the inits and the actions (robot, name, arguments, timestep) of a compact trace"""
+    with open_file(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(TRACE_MAGIC):
+        raise ValueError(path + " is not a trace")
+    position = len(TRACE_MAGIC)
+    inits = []
+    columns = {column: [] for column, _ in TRACE_COLUMNS}
+    while position < len(data):
+        size, length = (int(n) for n in np.frombuffer(data, dtype="<u8", count=2, offset=position))
+        position += 16
+        if size:
+            inits += data[position:position + size].decode().split("\n")
+        position += size
+        for column, dtype in TRACE_COLUMNS:
+            columns[column] += np.frombuffer(data, dtype=dtype, count=length, offset=position).tolist()
+            position += length * np.dtype(dtype).itemsize
+
+    def actions():
+        for rid, t, code, arg0, arg1 in zip(*(columns[column] for column, _ in TRACE_COLUMNS)):
+            yield rid, NAMES[code], [arg0, arg1], t
+    return inits, actions()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Converts a compact trace of pathfind.py to asprilo text "
+                                                 "(occurs/3 atoms) for the visualizer")
+    parser.add_argument("trace", help="the trace (.gz or .zst if compressed, .zst needs the python module "
+                                      "zstandard)")
+    parser.add_argument("-o", "--output", help="output file (default: stdout, .gz or .zst to compress, .zst needs "
+                                               "the python module zstandard)", default=None, type=str)
+    args = parser.parse_args()
+    for path in [args.trace, args.output]:
+        if path is not None and check_file(path) is not None:
+            parser.error(check_file(path))
+
+    inits, actions = read_trace(args.trace)
+    writer = get_writer(args.output)
+    for atom in inits:
+        writer.init(atom)
+    for rid, name, action_args, t in actions:
+        writer.action(rid, name, action_args, t)
+    writer.close()
@@ -0,0 +1,43 @@
+from benchmarker import solve
+from instance import Instance, compile_instance
+
+from time import time
+from typing import List, Optional, Tuple
+
+import clingo
+
+# state of a worker process (set by init_worker)
+worker_instance: Optional[Instance] = None
+worker_clingo_arguments: List[str] = []
+
+
+def init_worker(instance: str, cache_path: Optional[str], clingo_arguments: List[str]) -> None:
+    """Initializes a worker process of the process pool, the instance is compiled once per worker"""
+    global worker_instance, worker_clingo_arguments
+    worker_instance = compile_instance(instance, cache_path, clingo_arguments)
+    worker_clingo_arguments = clingo_arguments
+
+
+def solve_plan(encoding: str, inputs: str, parts, bounds: List[Optional[int]],
+               benchmark: bool) -> Tuple[List[str], List[Optional[Tuple[float, float, dict]]]]:
+    """Grounds and solves a planning program in a worker process (arguments are given by Robot.get_plan_task)
+    The horizons in bounds are tried one after another until there is a plan (None for the horizon of the encoding)
+    Returns the model as strings (clingo symbols can not be pickled)
+    and the grounding time, solving time and solving statistics of each program (None if benchmark is False)
+    """
+    stats = []
+    for bound in bounds:
+        prg = clingo.Control(worker_clingo_arguments)
+        prg.load(encoding)
+        worker_instance.load(prg)
+        prg.add("base", [], inputs)
+        if bound is not None:
+            prg.add("base", [], "bound(" + str(bound) + ").")
+        ts = time()
+        prg.ground(parts)
+        ground_time = time() - ts
+        model = solve(prg)
+        stats.append((ground_time, time() - ts - ground_time, prg.statistics) if benchmark else None)
+        if model:
+            break
+    return [str(atom) for atom in model], stats
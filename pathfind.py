@@ -1,13 +1,32 @@
 # -*- coding: utf-8 -*-
-from benchmarker import Benchmarker, solve
+from assignment import get_assignment_cost, get_costs, min_cost_assignment
+from benchmarker import Benchmarker, solve, timed, timer
+from conflicts import find_conflicts, find_conflicts_ahead
+from crossroads import CrossingTable
+from facts import FactBuilder
+from goals import ShelfChooser
+from instance import Instance, compile_instance
+from output import Writer, check_file, get_writer
+from parallel import init_worker, solve_plan
+from persistent import PersistentProgram
+from plan import NONE
+from plancache import PlanCache
+from planner import AdaptiveHorizon, NativePlanner
+from profiler import Profiler
+from reservations import ReservationTable
 from robot import Robot, RobotSequential, RobotShortest, RobotCrossing, RobotPrioritized
+from world import World
 
 import argparse
+import signal
 import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from time import time
-from typing import List
+from typing import Dict, List, Optional, Set, Tuple
 
 import clingo
+import numpy as np
 
 
 def print_error(arg: str) -> None:
@@ -16,7 +35,8 @@ def print_error(arg: str) -> None:
 
 class Pathfind(object):
     def __init__(self, instance: str, encoding: str, domain: str, model_output: bool, verbose: bool, benchmark: bool,
-                 result_path: str, highways: bool, clingo_arguments: List[str]) -> None:
+                 result_path: str, cache_path: Optional[str], facts: str, output: Optional[str], highways: bool,
+                 clingo_arguments: List[str]) -> None:
         self.instance: str = instance
         self.encoding: str = encoding
         self.domain: str = domain
@@ -25,6 +45,10 @@ class Pathfind(object):
         self.benchmark: bool = benchmark
         self.highwaysFlag: bool = highways
         self.clingo_arguments: List[str] = clingo_arguments
+        # adds the inputs to the programs: backend (symbols) or text (string programs which are parsed)
+        self.facts: FactBuilder = FactBuilder(facts)
+        # output of the inits and actions (stdout if no file is given)
+        self.output: Writer = get_writer(output) if model_output else Writer()
 
         self.benchmarker: Benchmarker = None
         if self.benchmark:
@@ -38,76 +62,36 @@ class Pathfind(object):
         self.orders = None
         self.products = None
 
-        self.prg = clingo.Control(self.clingo_arguments)
-        self.prg.load(instance)
+        # facts and tables of the instance (compiled once and cached)
+        with timer(self.benchmarker, "instance"):
+            self.compiled_instance: Instance = compile_instance(instance, cache_path, self.clingo_arguments)
+
+            self.prg = clingo.Control(self.clingo_arguments)
+            self.compiled_instance.load(self.prg)
 
         self.parse_instance()
 
         self.t: int = 0
+        if self.benchmark:
+            self.benchmarker.get_timestep = lambda: self.t
 
         # output of inits
         self.print_inits(self.get_inits())
 
     def parse_instance(self) -> None:
-        """Reads self.instance and saves all information in the according data structures
+        """Reads the compiled instance and saves all information in the according data structures
         Also creates the Robot objects, and saves their initial positions
         """
-        self.nodes = []  # [[id,x,y]]
-        self.highways = []  # [[id,x,y]]
+        # the lists are copied as they are changed during the run
+        self.nodes = [list(node) for node in self.compiled_instance.nodes]  # [[id,x,y]]
+        self.highways = [list(highway) for highway in self.compiled_instance.highways]  # [[id,x,y]]
         self.robots = []  # [Robot]
-        self.orders = []  # [[id,product]] in the end format is changed to [[id,product,station]]
-        # temporary dict, in the end the pickingstations will be added to the elements of self.orders
-        # because the atoms which specify the product for an order and the atom specifying the pickingstation
-        # are separate the temporary dict is needed to merge both values later
-        order_stations = {}  # key: order id, value: pickingstation id
-        self.pickingstations = []  # [[id,x,y]]
-        self.shelves = []  # [[id,x,y]]
-        self.products = []  # [[id,shelf]]
-
-        self.prg.ground([("base", [])])
-        with self.prg.solve(yield_=True) as h:
-            for m in h:
-                opt = m
-            for atom in opt.symbols(shown=True):
-                if atom.name == "init":
-                    name = atom.arguments[0].arguments[0].name
-                    id = atom.arguments[0].arguments[1].number
-                    if name == "node":
-                        x = atom.arguments[1].arguments[1].arguments[0].number
-                        y = atom.arguments[1].arguments[1].arguments[1].number
-                        self.nodes.append([id, x, y])
-                    elif name == "highway":
-                        x = atom.arguments[1].arguments[1].arguments[0].number
-                        y = atom.arguments[1].arguments[1].arguments[1].number
-                        self.highways.append([id, x, y])
-                    elif name == "robot":
-                        x = atom.arguments[1].arguments[1].arguments[0].number
-                        y = atom.arguments[1].arguments[1].arguments[1].number
-                        self.init_robot(id, x, y)
-                    elif name == "order":
-                        if atom.arguments[1].arguments[0].name == "line":
-                            product = atom.arguments[1].arguments[1].arguments[0].number
-                            self.orders.append([id, product])
-                        else:
-                            station = atom.arguments[1].arguments[1].number
-                            order_stations[id] = station
-                    elif name == "pickingStation":
-                        x = atom.arguments[1].arguments[1].arguments[0].number
-                        y = atom.arguments[1].arguments[1].arguments[1].number
-                        self.pickingstations.append([id, x, y])
-                    elif name == "product":
-                        shelf = atom.arguments[1].arguments[1].arguments[0].number
-                        # amount
-                        self.products.append([id, shelf])
-                    elif name == "shelf":
-                        x = atom.arguments[1].arguments[1].arguments[0].number
-                        y = atom.arguments[1].arguments[1].arguments[1].number
-                        self.shelves.append([id, x, y])
-
-        # assign pickingstations to orders
-        for order in self.orders:
-            order.append(order_stations[order[0]])
-        # now self.orders has format [[id,product,station]]
+        for rid, x, y in self.compiled_instance.robots:
+            self.init_robot(rid, x, y)
+        self.orders = [list(order) for order in self.compiled_instance.orders]  # [[id,product,station]]
+        self.pickingstations = [list(station) for station in self.compiled_instance.pickingstations]  # [[id,x,y]]
+        self.shelves = [list(shelf) for shelf in self.compiled_instance.shelves]  # [[id,x,y]]
+        self.products = [list(product) for product in self.compiled_instance.products]  # [[id,shelf]]
 
     def init_robot(self, rid: int, x: int, y: int) -> None:
         # implemented in subclasses in order to use respective robot class
@@ -146,18 +130,20 @@ class Pathfind(object):
     def print_inits(self, inits: List[str]) -> None:
         if self.model_output:
             for atom in inits:
-                print(atom + ".")
+                self.output.init(atom)
 
     def print_action(self, rid: int, name: str, args: List[int], t: int) -> None:
         if self.model_output:
             # for wait no atom is printed
             # in domain m pickups are not printed
             if not ((name == "wait") or (name == "pickup" and self.domain == "m")):
-                txt = "occurs(object(robot," + str(rid) + "),action(" + name + ",("
-                if (name == "move") or (name == "deliver"):
-                    txt += str(args[0]) + "," + str(args[1])
-                txt += "))," + str(t) + ")."
-                print(txt)
+                self.output.action(rid, name, args, t)
+
+    def print_actions(self, actions: List[Tuple[int, str, List[int], int]]) -> None:
+        """Prints several actions (robot, name, arguments, timestep) at once"""
+        if self.model_output:
+            self.output.actions([(rid, name, args, t) for rid, name, args, t in actions
+                                 if not ((name == "wait") or (name == "pickup" and self.domain == "m"))])
 
     def print_verbose(self, arg: str) -> None:
         if self.verbose:
@@ -167,6 +153,14 @@ class Pathfind(object):
         # implements the different strategies in the subclasses
         pass
 
+    def get_stats(self) -> dict:
+        """Additional statistics of the run which are saved in the main benchmark output"""
+        return self.facts.get_stats()
+
+    def print_stats(self) -> None:
+        for key, value in sorted(self.get_stats().items()):
+            self.print_verbose(key + ": " + str(value))
+
     def solve(self, prg: clingo.Control, type: str) -> List[clingo.Symbol]:
         # helper function to solve a logic program
         if self.benchmark:
@@ -176,15 +170,28 @@ class Pathfind(object):
             # just finds model
             return solve(prg)
 
+    def ground_program(self, prg: clingo.Control, parts, type: str) -> None:
+        # helper function to ground a logic program (the grounding time is saved when benchmarking)
+        if self.benchmark:
+            self.benchmarker.ground(prg, parts, type)
+        else:
+            prg.ground(parts)
+
 
 class PathfindCentralized(Pathfind):
     def __init__(self, instance: str, encoding: str, domain: str, model_output: bool, verbose: bool, benchmark: bool,
-                 result_path: str, highways: bool, clingo_arguments: List[str]) -> None:
+                 result_path: str, cache_path: Optional[str], assignment: str, facts: str, output: Optional[str],
+                 highways: bool, clingo_arguments: List[str]) -> None:
         self.assign_prg = clingo.Control(clingo_args)
         self.model = None
+        # assignment of the shelves: clingo (goals.lp), hungarian or check (both, exits if the costs differ)
+        self.assignment: str = assignment
+        self.robot_orders: List[List[int]] = []  # order of each robot (in the order of self.robots)
+        # key: engine, value: (cost, time) of the shelf assignment
+        self.assignment_stats: Dict[str, Tuple[int, float]] = {}
 
-        super().__init__(instance, encoding, domain, model_output, verbose, benchmark, result_path, highways,
-                         clingo_arguments)
+        super().__init__(instance, encoding, domain, model_output, verbose, benchmark, result_path, cache_path,
+                         facts, output, highways, clingo_arguments)
 
         self.assign_orders()
         self.assign_shelves()
@@ -193,12 +200,13 @@ class PathfindCentralized(Pathfind):
         self.benchmarker = Benchmarker("centralized", instance, domain, result_path)
 
     def assign_orders(self) -> None:
+        facts = []
         for rid, _, _ in self.robots:
-            atom = "order(" + str(self.orders[0][1]) + ", " + str(self.orders[0][2]) + ", " + str(self.orders[0][0]) + \
-                   ", " + str(rid) + ")."
-            self.prg.add("base", [], atom)
-            self.assign_prg.add("base", [], atom)
+            facts.append(clingo.Function("order", [self.orders[0][1], self.orders[0][2], self.orders[0][0], rid]))
+            self.robot_orders.append(self.orders[0])
             del self.orders[0]
+        self.facts.add(self.prg, facts)
+        self.facts.add(self.assign_prg, facts)
 
     def init_robot(self, rid: int, x: int, y: int) -> None:
         self.robots.append((rid, x, y))
@@ -212,17 +220,66 @@ class PathfindCentralized(Pathfind):
         return inits
 
     def assign_shelves(self):
-        self.assign_prg.load(self.instance)
+        if self.assignment == "hungarian":
+            goals = self.assign_shelves_hungarian()
+        else:
+            goals = self.assign_shelves_clingo()
+            if self.assignment == "check":
+                self.assign_shelves_hungarian()
+                if self.assignment_stats["clingo"][0] != self.assignment_stats["hungarian"][0]:
+                    print_error("Error: cost of the hungarian shelf assignment differs from goals.lp" +
+                                "\nhungarian: " + str(self.assignment_stats["hungarian"][0]) +
+                                "\nclingo: " + str(self.assignment_stats["clingo"][0]))
+                    sys.exit(1)
+
+        self.facts.add(self.prg, [atom for atom in goals if (atom.arguments[2].number == 1) or (self.domain == "b")])
+
+    def assign_shelves_clingo(self) -> List[clingo.Symbol]:
+        """Assigns the shelves with goals.lp, returns the goal/3 atoms"""
+        ts = time()
+        self.compiled_instance.load(self.assign_prg)
         self.assign_prg.load("./encodings/goals.lp")
 
-        self.assign_prg.ground([("base", []), ("centralized", [])])
+        self.ground_program(self.assign_prg, [("base", []), ("centralized", [])], "assignment")
 
         assignment = self.solve(self.assign_prg, "assignment")
 
-        for atom in assignment:
-            if atom.name == "goal":
-                if (atom.arguments[2].number == 1) or (self.domain == "b"):
-                    self.prg.add("base", [], str(atom) + ".")
+        shelves = {atom.arguments[1].number: atom.arguments[0].number for atom in assignment
+                   if atom.name == "chooseShelf"}
+        cost = -1
+        if assignment:
+            cost = get_assignment_cost(self.compiled_instance, self.robots, self.robot_orders, shelves)
+        self.assignment_stats["clingo"] = (cost, time() - ts)
+        return [atom for atom in assignment if atom.name == "goal"]
+
+    def assign_shelves_hungarian(self) -> List[clingo.Symbol]:
+        """Assigns the shelves with the hungarian method on the robot x shelf cost matrix (same costs as goals.lp)
+        Returns the goal/3 atoms (empty if there is no assignment)"""
+        ts = time()
+        costs, shelf_ids = get_costs(self.compiled_instance, self.robots, self.robot_orders)
+        columns = min_cost_assignment(costs)
+
+        positions = {id: (x, y) for id, x, y in self.compiled_instance.shelves}
+        stations = {id: (x, y) for id, x, y in self.compiled_instance.pickingstations}
+        goals = []
+        for (rid, _, _), order, column in zip(self.robots, self.robot_orders, columns):
+            shelf = positions[shelf_ids[column]]
+            goals.append(clingo.Function("goal", [shelf, rid, 1]))
+            goals.append(clingo.Function("goal", [shelf, rid, 3]))
+            goals.append(clingo.Function("goal", [stations[order[2]], rid, 2]))
+
+        cost = -1
+        if columns:
+            cost = int(sum(costs[i, j] for i, j in enumerate(columns)))
+        self.assignment_stats["hungarian"] = (cost, time() - ts)
+        return goals
+
+    def get_stats(self) -> dict:
+        stats = super().get_stats()
+        for engine, (cost, assignment_time) in self.assignment_stats.items():
+            stats["assignment_" + engine + "_cost"] = cost
+            stats["assignment_" + engine + "_time"] = assignment_time
+        return stats
 
     def run(self):
         self.t = 0
@@ -232,7 +289,7 @@ class PathfindCentralized(Pathfind):
         if self.highways:
             parts.append(("highways", []))
 
-        self.prg.ground(parts)
+        self.ground_program(self.prg, parts, "plan")
 
         self.model = self.solve(self.prg, "plan")
 
@@ -263,39 +320,106 @@ class PathfindCentralized(Pathfind):
 
 class PathfindDecentralized(Pathfind):
     def __init__(self, instance: str, encoding: str, domain: str, model_output: bool, verbose: bool, benchmark: bool,
-                 result_path: str, external: bool, highways: bool, clingo_arguments: List[str]) -> None:
+                 result_path: str, cache_path: Optional[str], external: bool, conflicts: str, simulation: str,
+                 lookahead: int, processes: int, plan_cache: int, planner: str, horizon: str, shelves: str, facts: str,
+                 output: Optional[str], highways: bool, clingo_arguments: List[str]) -> None:
         """Assigns initial order to the robots and plans it
         Instance is saved in data structures by helper function parse_instance
         (also generates the Robot objects)
         """
         # input parameters (needed in init)
         self.external: bool = external
-        super().__init__(instance, encoding, domain, model_output, verbose, benchmark, result_path, highways,
-                         clingo_arguments)
+        self.conflicts: str = conflicts
+        self.simulation: str = simulation
+        self.skipped: int = 0  # number of timesteps performed at once (without stepping through them)
+        self.lookahead: int = lookahead  # number of timesteps in which conflicts are predicted (0: no prediction)
+        # robots which wait because of a predicted conflict, key: robot id, value: [plan, remaining waits]
+        self.holds: Dict[int, list] = {}
+        self.predicted: int = 0  # predicted conflicts which were resolved before they happened
+        self.solves_saved: int = 0  # estimated number of solved programs the strategy didn't need for them
+        # process pool for solving independent planning programs in parallel (not with externals)
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.prefetched = {}  # key: (robot id, inputs), value: future of solve_plan
+        if processes > 1 and not external and planner == "clingo":
+            self.pool = ProcessPoolExecutor(processes, initializer=init_worker,
+                                            initargs=(instance, cache_path, clingo_arguments))
+        super().__init__(instance, encoding, domain, model_output, verbose, benchmark, result_path, cache_path,
+                         facts, output, highways, clingo_arguments)
+
+        for robot in self.robots:
+            robot.facts = self.facts
+
+        # plans are cached (shared by all robots) if a cache size is given
+        self.plan_cache: Optional[PlanCache] = None
+        if plan_cache > 0:
+            self.plan_cache = PlanCache(plan_cache)
+            for robot in self.robots:
+                robot.plan_cache = self.plan_cache
+
+        # the native planner replaces solving the planning program
+        self.planner: Optional[NativePlanner] = None
+        if planner == "native":
+            self.planner = NativePlanner(self.compiled_instance, domain, highways,
+                                         isinstance(self, PathfindDecentralizedPrioritized))
+            for robot in self.robots:
+                robot.planner = self.planner
+
+        # adaptive horizon for the planning program
+        # with externals the horizon is always adaptive (each plan is restricted by the externals late/1,
+        # manhattan distances unless graph distances are chosen)
+        self.horizon: Optional[AdaptiveHorizon] = None
+        if (horizon != "fixed" or external) and planner == "clingo":
+            self.horizon = AdaptiveHorizon(self.compiled_instance, domain, highways,
+                                           isinstance(self, PathfindDecentralizedPrioritized),
+                                           "manhattan" if horizon == "fixed" else horizon)
+            for robot in self.robots:
+                robot.horizon = self.horizon
+
+        # with externals all robots solve one planning program which is only grounded again for a larger horizon
+        self.program: Optional[PersistentProgram] = None
+        if external and planner == "clingo":
+            self.program = PersistentProgram(self.horizon.horizon)
+            for robot in self.robots:
+                robot.program = self.program
+
+        # native shelf choice replaces solving goals.lp for every new order
+        self.shelf_chooser: Optional[ShelfChooser] = None
+        if shelves != "clingo":
+            self.shelf_chooser = ShelfChooser(self.compiled_instance, highways, shelves)
+            for robot in self.robots:
+                robot.shelf_chooser = self.shelf_chooser
 
         # more initializing
-        self.orders_in_delivery = []
-        self.used_shelves = []
+        # open orders and orders in delivery in queue order, key: (order id, product), value: [id,product,station]
+        self.orders = {(order[0], order[1]): order for order in self.orders}
+        self.orders_in_delivery = {}
+        self.used_shelves = set()
+        # indexes of the products, used to find the possible shelves of an order
+        self.product_shelves: Dict[int, List[int]] = defaultdict(list)  # key: product, value: [shelf]
+        self.shelf_products: Dict[int, List[int]] = defaultdict(list)  # key: shelf, value: [product]
+        for product, shelf in self.products:
+            self.product_shelves[product].append(shelf)
+            self.shelf_products[shelf].append(product)
+        # number of shelves which have the product and are not used, key: product
+        self.free_shelves: Dict[int, int] = {product: len(shelves) for product, shelves in self.product_shelves.items()}
 
         self.init_state()
 
-        # initialize robots
-        for robot in self.robots:
-            self.plan(robot)  # assigns an order and plans it
+        # initialize robots (assigns an order and plans it)
+        self.plan_robots(self.robots)
 
     def init_state(self) -> None:
-        # initialize state matrix, saves which positions are free (1=free, 0=blocked)
-        self.state = []
-        for i in range(max(self.nodes, key=lambda item: item[1])[1]):  # range(x-size)
-            self.state.append([])
-            for j in range(max(self.nodes, key=lambda item: item[2])[2]):  # range(y-size)
-                self.state[i].append(1)
-        # save robot start position in self.state
+        # initialize the world state, the occupancy grid saves which positions are free (1=free, 0=blocked)
+        self.world = World(max(self.nodes, key=lambda item: item[1])[1], max(self.nodes, key=lambda item: item[2])[2],
+                           [r.id for r in self.robots])
+        for r in self.robots:
+            r.set_world(self.world)
+        # save robot start position in the occupancy grid
         for r in self.robots:
-            self.state[r.pos[0] - 1][r.pos[1] - 1] = 0
+            self.world.block(r.pos)
 
         for robot in self.robots:
-            robot.update_state(self.state)
+            robot.update_state(self.world)
 
     def get_inits(self) -> List[str]:
         inits = super().get_inits()
@@ -308,6 +432,27 @@ class PathfindDecentralized(Pathfind):
 
         return inits
 
+    def get_stats(self) -> dict:
+        stats = super().get_stats()
+        # without externals every plan needs its own grounding pass
+        # with externals the planning program shared by all robots is only grounded for larger horizons
+        stats["plans"] = sum(robot.plans for robot in self.robots)
+        stats["groundings"] = sum(robot.groundings for robot in self.robots)
+        stats["groundings_saved"] = stats["plans"] - stats["groundings"]
+        if self.plan_cache is not None:
+            stats["plan_cache_hits"] = self.plan_cache.hits
+            stats["plan_cache_misses"] = self.plan_cache.misses
+        if self.horizon is not None:
+            stats["horizon_extensions"] = sum(robot.extensions for robot in self.robots)
+        if self.shelf_chooser is not None:
+            stats["shelf_choices"] = self.shelf_chooser.choices
+        if self.simulation == "event":
+            stats["skipped_timesteps"] = self.skipped
+        if self.lookahead > 0:
+            stats["lookahead_conflicts"] = self.predicted
+            stats["lookahead_solves_saved"] = self.solves_saved
+        return stats
+
     def perform_action(self, robot: Robot):
         """Performs the action of robot
         If the order is finished with this action, a new order is (assigned and) planned
@@ -336,73 +481,214 @@ class PathfindDecentralized(Pathfind):
             if self.domain == "b":
                 self.plan(robot)
 
+    def get_next_event(self) -> int:
+        """Returns the number of timesteps until the next event
+        In the timesteps before the next event all robots only move along their plans, an event is any other action,
+        the end of a plan (deadlock retries are a new event in every timestep) or an idle robot getting an order
+        """
+        # idle robots only get an order at an event (orders and shelves are only released at events)
+        assignable = any(self.free_shelves.get(order[1], 0) > 0 for order in self.orders.values())
+        steps = None
+        for robot in self.robots:
+            if robot.plan_finished and robot.shelf == -1 and not assignable:
+                continue
+            moves = robot.get_moves()
+            if steps is None or moves < steps:
+                steps = moves
+            if steps == 0:
+                break
+        return steps or 0
+
+    def fast_forward(self, steps: int) -> None:
+        """Performs the next steps timesteps at once (all robots only move, see get_next_event)"""
+        moves = [(robot.id, robot.skip(steps)) for robot in self.robots if robot.get_moves() > 0]
+        if self.model_output:
+            self.print_actions([(rid, "move", [dx[i], dy[i]], self.t + 1 + i) for i in range(steps)
+                                for rid, (dx, dy) in moves])
+        self.t += steps
+        self.skipped += steps
+
+    def get_trajectories(self, steps: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the positions of all robots in the next steps timesteps if they follow their plans
+        (row i: robot i, column s: position after s timesteps, column 0: current position)
+        Waiting robots continue their plans later, robots without a plan stay on their position
+        """
+        dx = np.zeros((len(self.robots), steps + 1), dtype=np.int64)
+        dy = np.zeros((len(self.robots), steps + 1), dtype=np.int64)
+        for i, robot in enumerate(self.robots):
+            if robot.next_action.name == "":
+                continue
+            delay = int(robot.waiting) + self.get_hold(robot)
+            if delay < steps:
+                dx[i, delay + 1:], dy[i, delay + 1:] = robot.model.get_directions(robot.t, steps - delay)
+        return (self.world.positions[:, 0:1] + np.cumsum(dx, axis=1),
+                self.world.positions[:, 1:2] + np.cumsum(dy, axis=1))
+
+    def get_conflict_free_steps(self, margin: int) -> int:
+        """Returns the number of timesteps which can be performed at once if the plans are not free of conflicts:
+        the timesteps until the next event (see get_next_event, at most lookahead) without predicted conflicts
+        margin: number of timesteps after them which also have to be free of predicted conflicts
+        """
+        if self.holds:
+            return 0
+        steps = min(self.get_next_event(), self.lookahead)
+        if steps > 0:
+            conflicts = find_conflicts_ahead([robot.id for robot in self.robots],
+                                             *self.get_trajectories(steps + margin))
+            if conflicts:
+                steps = max(0, min(steps, conflicts[0][0] - 1 - margin))
+        return steps
+
+    def get_hold(self, robot) -> int:
+        """Returns the number of timesteps the robot still waits because of a predicted conflict
+        (0 if its plan changed since)"""
+        hold = self.holds.get(robot.id)
+        if hold is None or hold[0] is not robot.model:
+            return 0
+        return hold[1]
+
+    def can_hold(self, robot) -> bool:
+        """Whether the robot can wait to resolve a predicted conflict"""
+        return robot.next_action.name == "move" and not robot.waiting
+
+    @timed("conflicts")
+    def resolve_ahead(self, solves: Dict[str, int]) -> None:
+        """Resolves the conflicts predicted in the next lookahead timesteps before they happen
+        by letting one of the robots wait (the conflicts of the current timestep are left to the strategy)
+        A robot only waits if none of its conflicts is predicted afterwards, otherwise the strategy resolves the
+        conflict when it happens
+        solves: names of the resolved conflicts and the number of solved programs the strategy needs for them
+        """
+        # robots which still wait because of conflicts predicted before (if their plan didn't change)
+        holds = {}
+        for robot in self.robots:
+            if self.get_hold(robot) > 0 and self.can_hold(robot):
+                self.add_wait(robot)
+                if self.get_hold(robot) > 1:
+                    holds[robot.id] = [robot.model, self.get_hold(robot) - 1]
+        self.holds = holds
+
+        ids = [robot.id for robot in self.robots]
+        x, y = self.get_trajectories(self.lookahead)
+        tried = set()
+        while True:
+            for step, r1, r2, name, _ in find_conflicts_ahead(ids, x, y):
+                if step > 1 and name in solves and (r1, r2) not in tried:
+                    break
+            else:
+                return
+            tried.add((r1, r2))
+            hold = self.find_hold(ids, x, y, step, r1, r2)
+            if hold is None:
+                continue
+            robot, waits, x, y = hold
+            self.print_verbose(name + " between " + str(r1) + " and " + str(r2) + " predicted at t=" +
+                               str(self.t + step - 1) + ", r" + str(robot.id) + " waits " + str(waits) + " timesteps")
+            if waits > 1:
+                self.holds[robot.id] = [robot.model, waits - 1]
+            self.add_wait(robot)
+            self.predicted += 1
+            self.solves_saved += solves[name]
+
+    def find_hold(self, ids: List[int], x: np.ndarray, y: np.ndarray, step: int, r1: int, r2: int):
+        """Returns the robot of a conflict between r1 and r2 predicted in step timesteps which has to wait the fewest
+        timesteps until none of its conflicts is predicted anymore (the robot with the higher id if both wait equally
+        long) as (robot, timesteps, positions of the robots with the waits) or None if no robot can wait
+        The delayed conflict has to be in the look-ahead, so waiting can't only move the conflict out of it
+        """
+        best = None
+        for rid in sorted([r1, r2], reverse=True):
+            i = self.world.index[rid]
+            robot = self.robots[i]
+            if not self.can_hold(robot):
+                continue
+            for waits in range(1, self.lookahead - step + 1 if best is None else best[1]):
+                hx, hy = x.copy(), y.copy()
+                hx[i, :waits], hy[i, :waits] = x[i, 0], y[i, 0]
+                hx[i, waits:], hy[i, waits:] = x[i, :x.shape[1] - waits], y[i, :y.shape[1] - waits]
+                if not any(rid in conflict[1:3] for conflict in find_conflicts_ahead(ids, hx, hy)):
+                    best = (robot, waits, hx, hy)
+                    break
+        return best
+
     def assign_order(self, robot):
         """Assign the first possible order to the robot
         Return True/False if an order was assigned/wasn't assigned
         """
-        # possible_shelves is used to check if an order can be completed
-        possible_shelves = []
-        o = -1
-        possible_order = False
-        # no possible order and not all orders checked
-        while (not possible_order) and (o != len(self.orders) - 1):
-            o += 1
-            # list of all shelves which have the needed product
-            possible_shelves = [shelf for [sid, shelf] in self.products if sid == self.orders[o][1]]
-            # remove already used shelves
-            for sid in self.used_shelves:
-                if sid in possible_shelves:
-                    possible_shelves.remove(sid)
-            # if there are shelves the order is possible
-            if possible_shelves:
-                possible_order = True
-        if possible_order:
-            # assign the order to the robot and say which shelves can be used
-            robot.set_order(self.orders[o], possible_shelves)
-            # make sure the order isn't assigned again
-            self.reserve_order(self.orders[o])
-        return possible_order
+        for order in self.orders.values():
+            # if there are shelves with the product which are not used the order is possible
+            if self.free_shelves.get(order[1], 0) > 0:
+                # assign the order to the robot and say which shelves can be used
+                robot.set_order(order, [shelf for shelf in self.product_shelves[order[1]]
+                                        if shelf not in self.used_shelves])
+                # make sure the order isn't assigned again
+                self.reserve_order(order)
+                return True
+        return False
 
     def finish_order(self, order, shelf):
         """Releases the shelf and removes the order from orders_in_delivery"""
         self.release_shelf(shelf)
-        self.orders_in_delivery.remove(order)
+        del self.orders_in_delivery[(order[0], order[1])]
 
     def reserve_order(self, order):
-        """Adds the order to list of orders which are currently being delivered
-        and removes from list of orders which are open
+        """Adds the order to the orders which are currently being delivered
+        and removes it from the orders which are open
         """
-        self.orders_in_delivery.append(order)
-        self.orders.remove(order)
+        self.orders_in_delivery[(order[0], order[1])] = order
+        del self.orders[(order[0], order[1])]
 
     def release_order(self, order):
-        """Removes the order from list of orders which are currently being delivered
-        and adds it again to the list of order which are open
+        """Removes the order from the orders which are currently being delivered
+        and adds it again to the end of the orders which are open
         This function is needed for situations in which the robot is deadlocked
         in his start position and can't start the delivery of the order
         """
-        self.orders_in_delivery.remove(order)
-        self.orders.append(list(order))
+        del self.orders_in_delivery[(order[0], order[1])]
+        self.orders[(order[0], order[1])] = list(order)
 
     def reserve_shelf(self, shelf):
-        """Add the shelf to the list of shelves which are already in use"""
+        """Add the shelf to the set of shelves which are already in use"""
         if shelf not in self.used_shelves:
-            self.used_shelves.append(shelf)
+            self.used_shelves.add(shelf)
+            for product in self.shelf_products[shelf]:
+                self.free_shelves[product] -= 1
 
     def release_shelf(self, shelf):
-        """Removes the shelf from the list of shelves which are already in use"""
+        """Removes the shelf from the set of shelves which are already in use"""
         if shelf in self.used_shelves:
             self.used_shelves.remove(shelf)
+            for product in self.shelf_products[shelf]:
+                self.free_shelves[product] += 1
 
     def plan(self, robot):
         """First checks if robot has an order assigned (if not tries to assign one)
         and then calls robot.solve (if the robot already had an order assigned this
         causes the robot to replan, otherwise the plans the new order)
         """
+        if not self.start_plan(robot):
+            return False  # no order can be assigned
+
+        found_plan = robot.plan()
+
+        if found_plan:  # if the robot found a plan the shelf has to be reserved
+            self.reserve_shelf(robot.shelf)
+            return True
+        else:  # robot couldn't find a plan
+            if robot.shelf == -1:
+                # robot couldn't start planning the order (because he deadlocked in his start position)
+                # release the order so that other robots can try to plan it
+                self.release_order(robot.order)
+            return False
+
+    def start_plan(self, robot):
+        """Assigns an order to the robot if it doesn't have one
+        Returns False if no order can be assigned
+        """
         if robot.shelf == -1:  # robot doesn't have a order assigned
             if not self.assign_order(robot):  # try to assign a order
                 return False  # no order can be assigned
-            
+
             if self.domain == "m":
                 self.print_verbose("robot" + str(robot.id) + " planning order id=" + str(robot.order[0]) + " product="
                                    + str(robot.order[1]) + " at t=" + str(self.t))
@@ -417,47 +703,138 @@ class PathfindDecentralized(Pathfind):
                 self.print_verbose("robot" + str(robot.id) + " planning step 3 at t=" + str(self.t))
             else:
                 self.print_verbose("robot" + str(robot.id) + " replanning at t=" + str(self.t))
-
-        found_plan = robot.plan()
-
-        if found_plan:  # if the robot found a plan the shelf has to be reserved
-            self.reserve_shelf(robot.shelf)
-            return True
-        else:  # robot couldn't find a plan
-            if robot.shelf == -1:
-                # robot couldn't start planning the order (because he deadlocked in his start position)
-                # release the order so that other robots can try to plan it
+        return True
+
+    def plan_robots(self, robots):
+        """Calls plan for all robots (in the given order)
+        With a process pool the planning programs are solved in parallel:
+        orders and shelves are assigned in the given order and each shelf is reserved as soon as it is chosen
+        (and released again if no plan is found), the plans are used in the given order
+        so the result does not depend on the scheduling of the processes
+        """
+        if self.pool is None:
+            for robot in robots:
+                self.plan(robot)
+            return
+
+        tasks = []
+        for robot in robots:
+            if not self.start_plan(robot):
+                continue
+            if not robot.prepare_plan():
+                # no shelf could be assigned
                 self.release_order(robot.order)
-            return False
+                continue
+            # reserve the shelf now, so that the following robots can't choose it
+            reserved = robot.shelf not in self.used_shelves
+            self.reserve_shelf(robot.shelf)
+            model = robot.get_cached_plan()
+            tasks.append((robot, reserved, model, self.submit_plan(robot) if model is None else None))
+
+        for robot, reserved, model, task in tasks:
+            if self.finish_plan(robot, model, task):
+                robot.use_new_plan()
+            elif reserved:
+                self.release_shelf(robot.shelf)
+
+    @timed("planning")
+    def finish_plan(self, robot, model, task):
+        """Uses the cached model or the result of the task submitted by submit_plan for the plan of robot"""
+        if task is None:
+            return robot.use_cached_plan(model)
+        model, stats = task.result()
+        return robot.finish_plan([clingo.parse_term(atom) for atom in model], stats)
+
+    def submit_plan(self, robot):
+        """Submits the planning program of robot to the process pool
+        A result which was prefetched for exactly the same inputs is used instead of solving again
+        """
+        task = robot.get_plan_task()
+        future = self.prefetched.pop((robot.id, task[1]), None)
+        if future is None:
+            future = self.pool.submit(solve_plan, *task)
+        return future
+
+    def prefetch_plan(self, robot):
+        """Speculatively submits the planning program robot would solve after update_state
+        (used by submit_plan if the inputs are still the same when the robot replans)
+        """
+        if robot.shelf == -1:
+            return
+        # the state and current goal of the robot are only changed when it actually replans
+        state, current_goal = robot.state, robot.current_goal
+        robot.update_state(self.world)
+        task = robot.get_plan_task()
+        robot.state, robot.current_goal = state, current_goal
+        if (robot.id, task[1]) not in self.prefetched:
+            self.prefetched[(robot.id, task[1])] = self.pool.submit(solve_plan, *task)
+
+    def clear_prefetched(self):
+        for future in self.prefetched.values():
+            future.cancel()
+        self.prefetched = {}
+
+    def shutdown_pool(self):
+        """Cancels the prefetched plans which were not used and shuts the process pool down (at the end of run)"""
+        if self.pool is not None:
+            self.clear_prefetched()
+            self.pool.shutdown()
 
     def add_wait(self, r):
         """Add a wait action to the robots plan"""
         self.print_verbose("r" + str(r.id) + " waits")
         r.wait()
-        self.state[r.next_pos[0] - 1][r.next_pos[1] - 1] = 0
+        self.world.block(r.next_pos)
         
+    @timed("conflicts")
     def check_conflicts(self):
         """Finds all conflicts between robots
         and returns a list of conflicts
         """
-        self.prg = clingo.Control(self.clingo_arguments)
-        self.prg.load("./encodings/conflicts.lp")
+        robots = []
         for r in self.robots:
             if r.next_action != clingo.Function("", []):
-                self.prg.add("base", [], str(r.next_action) + ".")
+                robots.append((r.id, r.pos, r.next_action))
             else:
-                self.prg.add("base", [], str("wait(" + str(r.id) + ")."))
-                
-            self.prg.add("base", [], "position(" + str(r.id) + ",(" + str(r.pos[0]) + "," + str(r.pos[1]) + ")).")
-        self.prg.ground([("base", [])])
+                robots.append((r.id, r.pos, clingo.Function("wait", [r.id])))
+
+        return self.detect_conflicts(robots)
+
+    def detect_conflicts(self, robots):
+        """Computes the conflicts for the given robots (id, position, next action or None)
+        natively, with the encoding conflicts.lp or with both (results are compared)
+        """
+        if self.conflicts == "native":
+            return find_conflicts(robots)
+
+        conflicts = self.find_conflicts_clingo(robots)
+        if self.conflicts == "check":
+            native = find_conflicts(robots)
+            if sorted(native) != sorted(conflicts):
+                print_error("Error: native conflict detection differs from conflicts.lp at t=" + str(self.t) +
+                            "\nnative: " + " ".join(str(c) for c in native) +
+                            "\nclingo: " + " ".join(str(c) for c in conflicts))
+                sys.exit(1)
+        return conflicts
+
+    def find_conflicts_clingo(self, robots):
+        """Computes the conflicts for the given robots with the encoding conflicts.lp"""
+        self.prg = clingo.Control(self.clingo_arguments)
+        self.prg.load("./encodings/conflicts.lp")
+        facts = []
+        for rid, pos, action in robots:
+            if action is not None:
+                facts.append(action)
+
+            facts.append(clingo.Function("position", [rid, (pos[0], pos[1])]))
+        self.facts.add(self.prg, facts)
+        self.ground_program(self.prg, [("base", [])], "conflict")
 
         return self.solve(self.prg, "conflict")
 
     def reset_state(self):
-        """Sets all values in the state array to 1 (empty)"""
-        for i in range(len(self.state)):
-            for j in range(len(self.state[0])):
-                self.state[i][j] = 1
+        """Sets all positions in the occupancy grid to 1 (empty)"""
+        self.world.reset()
 
 
 class PathfindDecentralizedSequential(PathfindDecentralized):
@@ -465,8 +842,9 @@ class PathfindDecentralizedSequential(PathfindDecentralized):
         self.benchmarker = Benchmarker("sequential", instance, domain, result_path)
 
     def init_robot(self, rid: int, x: int, y: int) -> None:
-        self.robots.append(RobotSequential(rid, [x, y], self.encoding, self.domain, self.instance, self.external,
-                                           self.highwaysFlag, self.clingo_arguments, self.benchmark, self.benchmarker))
+        self.robots.append(RobotSequential(rid, [x, y], self.encoding, self.domain, self.compiled_instance,
+                                           self.external, self.highwaysFlag, self.clingo_arguments, self.benchmark,
+                                           self.benchmarker))
 
     def run(self):
         """Main function of Pathfind
@@ -474,11 +852,11 @@ class PathfindDecentralizedSequential(PathfindDecentralized):
         When robots have completed an order, they get assigned a new order
         Finishes when all orders are delivered
         """
-        while self.orders != [] or self.orders_in_delivery != []:
+        while self.orders or self.orders_in_delivery:
             self.t += 1
             
             for robot in self.robots:
-                robot.update_state(self.state)
+                robot.update_state(self.world)
 
                 for conflict in self.check_conflicts_robot(robot):
                     if conflict.name in ["swap", "conflict"]:
@@ -487,48 +865,81 @@ class PathfindDecentralizedSequential(PathfindDecentralized):
                     if conflict.name == "conflictW":
                         self.plan(robot)
 
-                self.state[robot.pos[0] - 1][robot.pos[1] - 1] = 1  # mark old position as free
+                self.world.free(robot.pos)  # mark old position as free
                 self.perform_action(robot)
-                self.state[robot.pos[0] - 1][robot.pos[1] - 1] = 0  # mark new position as blocked
+                self.world.block(robot.pos)  # mark new position as blocked
 
         if self.domain == "m":
             self.t -= 1
 
         return self.t
 
+    def init_state(self) -> None:
+        super().init_state()
+        # occupancy index, saves which robots are on a position (updated in perform_action)
+        self.occupied: Dict[Tuple[int, int], Set[int]] = defaultdict(set)
+        for robot in self.robots:
+            self.occupied[(robot.pos[0], robot.pos[1])].add(robot.id)
+
+    def perform_action(self, robot: Robot):
+        old_pos = (robot.pos[0], robot.pos[1])
+        super().perform_action(robot)
+        if old_pos != (robot.pos[0], robot.pos[1]):
+            self.occupied[old_pos].discard(robot.id)
+            self.occupied[(robot.pos[0], robot.pos[1])].add(robot.id)
+
+    @timed("conflicts")
     def check_conflicts_robot(self, robot):
         """Finds all conflicts between robots
         and returns a list of conflicts
         """
-        self.prg = clingo.Control(self.clingo_arguments)
-        self.prg.load("./encodings/conflicts.lp")
+        if self.conflicts == "native":
+            return self.check_conflicts_occupied(robot)
 
+        robots = []
         for r in self.robots:
             if r != robot:
-                self.prg.add("base", [], str("wait(" + str(r.id) + ")."))
-            else: 
-                if r.next_action != clingo.Function("", []):
-                    self.prg.add("base", [], str(r.next_action) + ".")
+                robots.append((r.id, r.pos, clingo.Function("wait", [r.id])))
+            elif r.next_action != clingo.Function("", []):
+                robots.append((r.id, r.pos, r.next_action))
+            else:
+                robots.append((r.id, r.pos, None))
+
+        conflicts = self.detect_conflicts(robots)
+        if self.conflicts == "check" and sorted(self.check_conflicts_occupied(robot)) != sorted(conflicts):
+            print_error("Error: occupancy index conflicts differ from conflicts.lp at t=" + str(self.t) +
+                        " for robot" + str(robot.id))
+            sys.exit(1)
+        return conflicts
+
+    def check_conflicts_occupied(self, robot):
+        """Finds the conflicts of robot with the occupancy index
+        As all other robots wait, the only possible conflicts are conflictW atoms for the robots
+        on the position robot moves onto
+        """
+        if robot.next_action.name != "move":
+            return []
+        pos = (robot.pos[0] + robot.next_action.arguments[0].arguments[0].number,
+               robot.pos[1] + robot.next_action.arguments[0].arguments[1].number)
+        return [clingo.Function("conflictW", [robot.id, rid, pos]) for rid in sorted(self.occupied.get(pos, ()))]
 
-            self.prg.add("base", [], "position(" + str(r.id) + ",(" + str(r.pos[0]) + "," + str(r.pos[1]) + ")).")
-        self.prg.ground([("base", [])])
-
-        return self.solve(self.prg, "conflict")
-        
 
 class PathfindDecentralizedShortest(PathfindDecentralized):
     def __init__(self, instance: str, encoding: str, domain: str, model_output: bool, verbose: bool, benchmark: bool,
-                 result_path: str, external: bool, highways: bool, clingo_arguments: List[str]) -> None:
+                 result_path: str, cache_path: Optional[str], external: bool, conflicts: str, simulation: str,
+                 lookahead: int, processes: int, plan_cache: int, planner: str, horizon: str, shelves: str, facts: str,
+                 output: Optional[str], highways: bool, clingo_arguments: List[str]) -> None:
         self.resolved = False
 
-        super().__init__(instance, encoding, domain, model_output, verbose, benchmark, result_path, external, highways,
-                         clingo_arguments)
+        super().__init__(instance, encoding, domain, model_output, verbose, benchmark, result_path, cache_path,
+                         external, conflicts, simulation, lookahead, processes, plan_cache, planner, horizon,
+                         shelves, facts, output, highways, clingo_arguments)
 
     def init_benchmarker(self, instance: str, domain: str, result_path: str) -> None:
         self.benchmarker = Benchmarker("shortest", instance, domain, result_path)
 
     def init_robot(self, rid: int, x: int, y: int) -> None:
-        self.robots.append(RobotShortest(rid, [x, y], self.encoding, self.domain, self.instance, self.external,
+        self.robots.append(RobotShortest(rid, [x, y], self.encoding, self.domain, self.compiled_instance, self.external,
                                          self.highwaysFlag, self.clingo_arguments, self.benchmark, self.benchmarker))
 
     def run(self):
@@ -536,8 +947,15 @@ class PathfindDecentralizedShortest(PathfindDecentralized):
         In case of a conflict (where both robots move) both robots find a new plan
         but only the robot for which the new plan adds less time uses the new plan
         For conflicts where only one robot moves the other robot waits
+        With the look-ahead conflicts are predicted and resolved early by letting one of the robots wait
         """
-        while self.orders != [] or self.orders_in_delivery != []:
+        while self.orders or self.orders_in_delivery:
+            # the timesteps without predicted conflicts are performed at once
+            # (the look-ahead of the following timesteps must not find conflicts either)
+            if self.simulation == "event" and self.lookahead > 0:
+                steps = self.get_conflict_free_steps(self.lookahead - 1)
+                if steps > 0:
+                    self.fast_forward(steps)
             self.t += 1
 
             if self.benchmark:
@@ -547,20 +965,33 @@ class PathfindDecentralizedShortest(PathfindDecentralized):
             for r in self.robots:
                 # no order assigned or no plan because in a deadlock
                 if (r.shelf == -1) or (r.next_action.name == ""):
-                    r.update_state(self.state)
+                    r.update_state(self.world)
                     self.plan(r)
 
             # unmark all old positions
             self.reset_state()
             # mark all new positions
             for r in self.robots:
-                self.state[r.next_pos[0] - 1][r.next_pos[1] - 1] = 0
+                self.world.block(r.next_pos)
+
+            # both robots of a conflict would have to replan
+            if self.lookahead > 0:
+                self.resolve_ahead({"conflict": 2, "swap": 2})
 
             self.resolved = True 
             while self.resolved:  # Needs to recheck for conflicts if a robot replans
                 self.resolved = False
                 conflicts = self.check_conflicts()
 
+                if self.pool is not None:
+                    # solve the replannings of all conflicts in advance
+                    # (only used if the inputs of the robot did not change until it replans)
+                    for conflict in conflicts:
+                        if conflict.name in ["conflict", "swap"]:
+                            for r in self.robots:
+                                if r.id in [conflict.arguments[0].number, conflict.arguments[1].number]:
+                                    self.prefetch_plan(r)
+
                 for conflict in conflicts:  # Conflict detection
                     self.resolved = True
                     if conflict.name in ["conflict", "swap"]:
@@ -578,8 +1009,7 @@ class PathfindDecentralizedShortest(PathfindDecentralized):
                                         
                                         # both robots move -> both have to find a new plan
                                         # self.replan returns added length of new plan
-                                        dr1 = self.replan(r1)
-                                        dr2 = self.replan(r2)
+                                        dr1, dr2 = self.replan(r1, r2)
             
                                         # choose which robot uses new plan
                                         # case 1: both robots are deadlocked
@@ -620,31 +1050,42 @@ class PathfindDecentralizedShortest(PathfindDecentralized):
                                         else:
                                             self.plan(r)
 
+                self.clear_prefetched()
+
             # perform all next actions
             for robot in self.robots:
                 if robot.next_action.name != "":
                     self.perform_action(robot)
 
+        self.shutdown_pool()
+
         if self.domain == "m":
             self.t -= 1
 
         return self.t
 
-    def replan(self, robot):
+    def replan(self, *robots):
         """Helper function used in shortest replanning strategy
-        finds a new plan and returns the added length
-        Argument out for benchmarking output (to know which replannigs belong together)
-        out = 0 for replannigs where only one robot replans
-        out = 1/2 for first/second robot when two robots replan
+        finds a new plan for each robot and returns the added lengths
+        With a process pool the planning programs of the robots are solved concurrently
         """
-        robot.update_state(self.state)
+        tasks = []
+        for robot in robots:
+            robot.update_state(self.world)
 
-        robot.find_new_plan()
+            if self.pool is None:
+                robot.find_new_plan()
+            elif robot.prepare_plan():
+                model = robot.get_cached_plan()
+                tasks.append((robot, model, self.submit_plan(robot) if model is None else None))
+
+        for robot, model, task in tasks:
+            self.finish_plan(robot, model, task)
 
         # compute how many timesteps the new plan added compared to the old plan
         # if deadlocked this is set to -1
-        d = robot.plan_length - (robot.old_plan_length - (robot.t - 1)) if robot.plan_length != -1 else -1
-        return d
+        return [robot.plan_length - (robot.old_plan_length - (robot.t - 1)) if robot.plan_length != -1 else -1
+                for robot in robots]
 
     def change_plan(self, robot):
         """Changes the plan of the robot to the new plan
@@ -653,22 +1094,33 @@ class PathfindDecentralizedShortest(PathfindDecentralized):
         """
         robot.use_new_plan()
         self.resolved = True
-        self.state[robot.next_pos[0] - 1][robot.next_pos[1] - 1] = 0
+        self.world.block(robot.next_pos)
 
 
 class PathfindDecentralizedCrossing(PathfindDecentralized):
     def __init__(self, instance: str, encoding: str, domain: str, model_output: bool, verbose: bool, benchmark: bool,
-                 result_path: str, external: bool, highways: bool, clingo_arguments: List[str]) -> None:
+                 result_path: str, cache_path: Optional[str], external: bool, conflicts: str, simulation: str,
+                 lookahead: int, processes: int, plan_cache: int, planner: str, horizon: str, shelves: str,
+                 crossroads: str, facts: str, output: Optional[str], highways: bool,
+                 clingo_arguments: List[str]) -> None:
         self.resolved = False
 
-        super().__init__(instance, encoding, domain, model_output, verbose, benchmark, result_path, external, highways,
-                         clingo_arguments)
+        super().__init__(instance, encoding, domain, model_output, verbose, benchmark, result_path, cache_path,
+                         external, conflicts, simulation, lookahead, processes, plan_cache, planner, horizon,
+                         shelves, facts, output, highways, clingo_arguments)
+
+        # the nearest crossings are looked up in a table instead of solving crossroad.lp
+        self.crossing_table: Optional[CrossingTable] = None
+        if crossroads == "table":
+            self.crossing_table = CrossingTable(self.compiled_instance)
+            for robot in self.robots:
+                robot.crossing_table = self.crossing_table
 
     def init_benchmarker(self, instance: str, domain: str, result_path: str) -> None:
         self.benchmarker = Benchmarker("crossing", instance, domain, result_path)
 
     def init_robot(self, rid: int, x: int, y: int) -> None:
-        self.robots.append(RobotCrossing(rid, [x, y], self.encoding, self.domain, self.instance, self.external,
+        self.robots.append(RobotCrossing(rid, [x, y], self.encoding, self.domain, self.compiled_instance, self.external,
                                          self.highwaysFlag, self.clingo_arguments, self.benchmark, self.benchmarker))
 
     def run(self):
@@ -678,17 +1130,21 @@ class PathfindDecentralizedCrossing(PathfindDecentralized):
         The robot closest to a crossing dodges the other robot using the crossing
         This method is only used for swapping conflict, all other conflicts
         are solved by making one of the robots wait"""
-        while self.orders != [] or self.orders_in_delivery != []:
+        while self.orders or self.orders_in_delivery:
             self.t += 1
             
             for r in self.robots:
                 # if the robot doesn't have a order or was in a deadlock it needs to find a new plan
                 if (r.shelf == -1) or (r.next_action.name == ""):
-                    r.update_state(self.state)
+                    r.update_state(self.world)
                     self.plan(r)
                 else:
                     self.next_action_possible(r, r.next_action)
 
+            # both robots of a swap would have to find their nearest crossing
+            if self.lookahead > 0:
+                self.resolve_ahead({"swap": 2 if self.crossing_table is None else 0})
+
             self.resolved = True 
             while self.resolved:  # Needs to recheck for conflicts if a robot replans
                 self.resolved = False
@@ -768,14 +1224,20 @@ class PathfindDecentralizedCrossing(PathfindDecentralized):
             # then perform the actions
             for robot in self.robots:
                 self.perform_action(robot)
-                self.state[robot.pos[0] - 1][robot.pos[1] - 1] = 1
-                self.state[robot.next_pos[0] - 1][robot.next_pos[1] - 1] = 0
+                self.world.free(robot.pos)
+                self.world.block(robot.next_pos)
+
+        self.shutdown_pool()
 
         if self.domain == "m":
             self.t -= 1
 
         return self.t
 
+    def can_hold(self, robot) -> bool:
+        # robots which dodge another robot have to follow their crossroad
+        return super().can_hold(robot) and not (robot.in_conflict or robot.dodging or robot.replanned)
+
     def add_crossroad(self, r1, r2):
         """Add crossroad to plan of r1 to dodge r2
         First get in which direction to dodge
@@ -838,46 +1300,31 @@ class PathfindDecentralizedCrossing(PathfindDecentralized):
         # the directions from which r2 is going to the crossing and off the crossing have to be removed
         move_to_cross = None
         move_from_cross = None
-        for atom in r2.model:
-            if atom.name == "move":
-                # r2.t (the next move r2 makes) + r1.cross_length (how many steps it is to the crossing)
-                if atom.arguments[2].number == r2.t + r1.cross_length:
-                    move_to_cross = atom
-                    if move_from_cross is not None:
-                        break  # we have all directions we need so we can stop the loop
-                # after going to the crossing r2 will leave the crossing in the next step -> + 1
-                elif atom.arguments[2].number == r2.t + r1.cross_length + 1:
-                    move_from_cross = atom
-                    if move_to_cross is not None:
-                        break  # we have all directions we need so we can stop the loop
+        # r2.t (the next move r2 makes) + r1.cross_length (how many steps it is to the crossing)
+        if r2.model.get_move(r2.t + r1.cross_length) is not None:
+            move_to_cross = r2.model.get_action(r2.t + r1.cross_length)
+        # after going to the crossing r2 will leave the crossing in the next step -> + 1
+        if r2.model.get_move(r2.t + r1.cross_length + 1) is not None:
+            move_from_cross = r2.model.get_action(r2.t + r1.cross_length + 1)
+        for t in range(r2.t + 1, r2.t + r1.cross_length + 1):
+            move = r2.model.get_move(t)
+            if move is not None:
                 # to make sure that r2 is actually going to the crossing we have to check
                 # if its moves are the same as those of r1
                 # all other moves (after the first and before going off the crossing)
                 # have to be the same as the previous move of r1
-                if (atom.arguments[2].number > r2.t) and (atom.arguments[2].number <= (r2.t + r1.cross_length)):
-                    # r1.cross_model is sorted so r1.cross_model[t-1] will be the move at time t
-                    if ((atom.arguments[0].arguments[0].number !=
-                         r1.cross_model[atom.arguments[2].number - r2.t - 1].arguments[0].arguments[0].number) or
-                            (atom.arguments[0].arguments[1].number !=
-                             r1.cross_model[atom.arguments[2].number - r2.t - 1].arguments[0].arguments[1].number)):
-                        # if the move isn't the same we record the time
-                        # the earliest time determines how long r1 has to dodge
-                        if t_finished is None:
-                            t_finished = atom.arguments[2].number - r2.t
-                        elif atom.arguments[2].number - r2.t < t_finished:
-                            t_finished = atom.arguments[2].number - r2.t
-            elif atom.name in ["putdown", "pickup"]:
-                if (atom.arguments[1].number > r2.t) and (atom.arguments[1].number <= (r2.t + r1.cross_length)):
-                    if t_finished is None:
-                        t_finished = atom.arguments[1].number - r2.t
-                    elif atom.arguments[1].number - r2.t < t_finished:
-                        t_finished = atom.arguments[1].number - r2.t
-            elif atom.name == "deliver":
-                if (atom.arguments[3].number > r2.t) and (atom.arguments[3].number <= (r2.t + r1.cross_length)):
-                    if t_finished is None:
-                        t_finished = atom.arguments[3].number - r2.t
-                    elif atom.arguments[3].number - r2.t < t_finished:
-                        t_finished = atom.arguments[3].number - r2.t
+                # r1.cross_model is sorted so r1.cross_model[t-1] will be the move at time t
+                cross_move = r1.cross_model[t - r2.t - 1]
+                if (move[0] != cross_move.arguments[0].arguments[0].number or
+                        move[1] != cross_move.arguments[0].arguments[1].number):
+                    # if the move isn't the same we record the time
+                    # the earliest time determines how long r1 has to dodge
+                    t_finished = t - r2.t
+                    break
+            elif r2.model.get_code(t) != NONE:
+                # pickup, deliver or putdown
+                t_finished = t - r2.t
+                break
 
         filtered_model = []
         # r1 has to dodge all the way
@@ -1082,10 +1529,10 @@ class PathfindDecentralizedCrossing(PathfindDecentralized):
         """Make the robot use the crossroad
         Update position, robot has to be checked for possible new conflicts"""
         # add the crossroad to the model, also generates the returning
-        self.state[r.next_pos[0] - 1][r.next_pos[1] - 1] = 1
+        self.world.free(r.next_pos)
         r.use_crossroad()
         self.resolved = True
-        self.state[r.next_pos[0] - 1][r.next_pos[1] - 1] = 0
+        self.world.block(r.next_pos)
 
     def block_crossings(self, r1, r2):
         """In certain cases the positions of r1 and r2 can't be used as crossings"""
@@ -1145,31 +1592,42 @@ class PathfindDecentralizedCrossing(PathfindDecentralized):
                     break
 
         if not possible:
-            self.state[r.next_pos[0] - 1][r.next_pos[1] - 1] = 1
+            self.world.free(r.next_pos)
             r.clear_state()
             self.plan(r)
             old_partners = r.reset_crossing()
             # delete r from conflict_partners of all partners
             for p in old_partners:
                 p.conflict_partners.pop(r)
-            self.state[r.next_pos[0] - 1][r.next_pos[1] - 1] = 0
+            self.world.block(r.next_pos)
         return possible
 
 
 class PathfindDecentralizedPrioritized(PathfindDecentralized):
     def __init__(self, instance: str, encoding: str, domain: str, model_output: bool, verbose: bool, benchmark: bool,
-                 result_path: str, external: bool, highways: bool, clingo_arguments: List[str]) -> None:
-        self.performed_action: [int] = []
+                 result_path: str, cache_path: Optional[str], external: bool, conflicts: str, simulation: str,
+                 lookahead: int, processes: int, plan_cache: int, planner: str, horizon: str, shelves: str, facts: str,
+                 output: Optional[str], highways: bool, clingo_arguments: List[str]) -> None:
+        self.reservations: ReservationTable = ReservationTable()
 
-        super().__init__(instance, encoding, domain, model_output, verbose, benchmark, result_path, external, highways,
-                         clingo_arguments)
+        # the plan of a robot depends on the plans of all other robots, so robots are always planned one after another
+        super().__init__(instance, encoding, domain, model_output, verbose, benchmark, result_path, cache_path,
+                         external, conflicts, simulation, lookahead, 1, plan_cache, planner, horizon,
+                         shelves, facts, output, highways, clingo_arguments)
 
     def init_benchmarker(self, instance: str, domain: str, result_path: str) -> None:
         self.benchmarker = Benchmarker("prioritized", instance, domain, result_path)
 
+    def get_stats(self) -> dict:
+        stats = super().get_stats()
+        stats["reservation_table_entries"] = self.reservations.peak_entries
+        stats["reservation_table_bytes"] = self.reservations.peak_bytes
+        return stats
+
     def init_robot(self, rid: int, x: int, y: int) -> None:
-        self.robots.append(RobotPrioritized(rid, [x, y], self.encoding, self.domain, self.instance, self.external,
-                                            self.highwaysFlag, self.clingo_arguments, self.benchmark, self.benchmarker))
+        self.robots.append(RobotPrioritized(rid, [x, y], self.encoding, self.domain, self.compiled_instance,
+                                            self.external, self.highwaysFlag, self.clingo_arguments, self.benchmark,
+                                            self.benchmarker))
 
     def plan(self, robot: RobotPrioritized):
         self.print_verbose("planning for robot" + str(robot.id))
@@ -1177,34 +1635,38 @@ class PathfindDecentralizedPrioritized(PathfindDecentralized):
         for r in self.robots:
             if robot != r:
                 self.print_verbose("collecting plan from robot" + str(r.id))
-                # r.get_plan() get an offset as the argument
-                # the offset is 1 if r has not yet performed an action in this timestep
-                # (as in this case r is one step behind robot)
-                # during initialisation the offset is always 0
-                plan = r.get_plan(1 if (r.id not in self.performed_action and self.t > 0) else 0)
-                if plan:
+                # the reservation table maps the current timestep to timestep 0 of the plan
+                plan = self.reservations.get_plan(r.id, self.t)
+                if plan is not None:
                     robot.add_plan(plan)
                 else:
                     self.print_verbose("robot" + str(r.id) + " does not have a plan, current position (" +
                                        str(r.pos[0]) + "," + str(r.pos[1]) + ") will be blocked")
                     robot.block_pos((r.pos[0], r.pos[1]))
 
-        super().plan(robot)
+        if super().plan(robot):
+            # timestep 0 of the new plan is the current timestep
+            self.reservations.commit(robot.id, robot.model, self.t)
+        else:
+            # without a new plan the robot stays on its position (blocked for the other robots, see above)
+            self.reservations.release(robot.id)
 
         robot.clear_additional_input()
         robot.clear_blocked_positions()
 
     def run(self):
-        while self.orders != [] or self.orders_in_delivery != []:
+        while self.orders or self.orders_in_delivery:
+            # the plans are free of conflicts, so only the events have to be simulated
+            if self.simulation == "event":
+                steps = self.get_next_event()
+                if steps > 0:
+                    self.fast_forward(steps)
             self.t += 1
+            self.reservations.advance(self.t)
 
             for robot in self.robots:
                 # perform action or find new plan
                 self.perform_action(robot)
-                # mark that robot performed an action
-                self.performed_action.append(robot.id)
-
-            self.performed_action = []
 
         if self.domain == "m":
             self.t -= 1
@@ -1217,7 +1679,7 @@ class PathfindDecentralizedTraffic(PathfindDecentralized):
         self.benchmarker = Benchmarker("traffic", instance, domain, result_path)
 
     def init_robot(self, rid: int, x: int, y: int) -> None:
-        self.robots.append(Robot(rid, [x, y], self.encoding, self.domain, self.instance, self.external,
+        self.robots.append(Robot(rid, [x, y], self.encoding, self.domain, self.compiled_instance, self.external,
                                  self.highwaysFlag, self.clingo_arguments, self.benchmark, self.benchmarker))
 
     def resolve_conflicts(self):
@@ -1234,13 +1696,15 @@ class PathfindDecentralizedTraffic(PathfindDecentralized):
                         self.add_wait(r1)
                         
     def run(self):
-        while self.orders != [] or self.orders_in_delivery != []:
+        while self.orders or self.orders_in_delivery:
+            # the timesteps without predicted conflicts are performed at once
+            if self.simulation == "event" and self.lookahead > 0:
+                steps = self.get_conflict_free_steps(0)
+                if steps > 0:
+                    self.fast_forward(steps)
             self.t += 1
 
-            for robot in self.robots:
-                action = robot.next_action
-                if action.name == "":
-                    self.plan(robot)
+            self.plan_robots([robot for robot in self.robots if robot.next_action.name == ""])
 
             # find and solve all conflicts for the current timestep
             self.resolve_conflicts()
@@ -1275,64 +1739,166 @@ if __name__ == "__main__":
                         default=False, action="store_true")
     parser.add_argument("-r", "--results", help="use custom directory for the benchmarking results (default: "
                                                 "'./results')", default='./results/', type=str)
-    # external not supported anymore
-    # parser.add_argument("-e", "--external", help="enables use of external atoms (only for sequential, shortest and "
-    #                                              "crossing strategy)",
-    #                     default=False, action="store_true")
+    parser.add_argument("--cache", help="directory for the cache of compiled instances (default: './cache')",
+                        default='./cache/', type=str)
+    parser.add_argument("--nocache", help="disables the on-disk cache of compiled instances", default=False,
+                        action="store_true")
+    parser.add_argument("-e", "--external", help="ground one planning program for all robots and replan by assigning "
+                                                 "external atoms (it is only grounded again if a plan needs a larger "
+                                                 "horizon; not for centralized strategy)",
+                        default=False, action="store_true")
+    parser.add_argument("-c", "--conflicts", help="conflict detection to be used: native (default), clingo (encoding "
+                                                  "conflicts.lp) or check (both, exits with an error if the results "
+                                                  "differ)", choices=["native", "clingo", "check"], default="native",
+                        type=str)
+    parser.add_argument("--simulation", help="simulation of the plan execution: event (default, the timesteps in "
+                                             "which all robots only move along their plans are performed at once; "
+                                             "prioritized strategy, shortest and traffic strategy with --lookahead) "
+                                             "or step (every timestep on its own)",
+                        choices=["event", "step"], default="event", type=str)
+    parser.add_argument("--lookahead", help="number of timesteps in which conflicts are predicted from the plans of "
+                                            "all robots (default: 0, no prediction): the shortest and crossing "
+                                            "strategy resolve predicted conflicts early by letting a robot wait, "
+                                            "the shortest and traffic strategy perform the timesteps without "
+                                            "predicted conflicts at once", default=0, type=int)
+    parser.add_argument("-p", "--processes", help="number of processes used to solve independent planning programs "
+                                                  "in parallel (default: 1, not for prioritized and centralized "
+                                                  "strategy or with -e)", default=1, type=int)
+    parser.add_argument("--plancache", help="number of plans kept in the plan cache shared by all robots (default: 0, "
+                                            "no caching; not for centralized strategy)", default=0, type=int)
+    parser.add_argument("--planner", help="planner backend for the plans of single robots: clingo (default, planning "
+                                          "encoding) or native (A* search, not for centralized strategy)",
+                        choices=["clingo", "native"], default="clingo", type=str)
+    parser.add_argument("--horizon", help="horizon of the planning program: fixed (default, horizon of the encoding), "
+                                          "manhattan or graph (adaptive horizon, starts with a lower bound of the plan "
+                                          "length from manhattan or graph distances and is extended while there is "
+                                          "no plan; with -e the horizon is always adaptive, manhattan unless graph "
+                                          "is chosen)", choices=["fixed", "manhattan", "graph"],
+                        default="fixed", type=str)
+    parser.add_argument("--shelves", help="shelf choice for the orders of single robots: clingo (default, encoding "
+                                          "goals.lp), manhattan or graph (native, minimizes the manhattan or graph "
+                                          "distance start -> shelf -> station -> shelf; not for centralized strategy)",
+                        choices=["clingo", "manhattan", "graph"], default="clingo", type=str)
+    parser.add_argument("--crossroads", help="search for the nearest crossing of the crossing strategy: clingo "
+                                             "(default, encoding crossroad.lp) or table (precomputed crossings and "
+                                             "shortest paths)", choices=["clingo", "table"], default="clingo",
+                        type=str)
+    parser.add_argument("--assignment", help="shelf assignment of the centralized strategy: clingo (default, encoding "
+                                             "goals.lp), hungarian (min-cost assignment) or check (both, exits with "
+                                             "an error if the costs differ)",
+                        choices=["clingo", "hungarian", "check"], default="clingo", type=str)
+    parser.add_argument("--facts", help="how the inputs are added to the programs: backend (default, atoms are "
+                                        "added with the clingo backend) or text (string programs which are parsed "
+                                        "by clingo)", choices=["backend", "text"], default="backend", type=str)
+    parser.add_argument("-o", "--output", help="write the model to a file instead of stdout: asprilo text or a "
+                                               "compact trace if the name contains .trace (converted to text by "
+                                               "output.py), compressed if the name ends with .gz or .zst "
+                                               "(.zst needs the optional python module zstandard)",
+                        default=None, type=str)
     parser.add_argument("-H", "--Highways", help="generate highway tuples if they are not given in the instance",
                         default=False, action="store_true")
+    parser.add_argument("--timesteps", help="with -b also save the time of each phase per timestep (timesteps.json)",
+                        default=False, action="store_true")
+    parser.add_argument("--profile", help="saves a CPU profile of the run as PROFILE.pstats (cProfile) and "
+                                          "PROFILE.collapsed (sampled stacks for flamegraphs, solve calls are tagged "
+                                          "with the type of solving and the timestep)", default=None, type=str)
+    parser.add_argument("--clingo", help="additional arguments of all clingo programs (e.g. '--seed=1 "
+                                         "--configuration=frumpy')", default="", type=str)
     parser.add_argument("--debug", help="enables clingo warnings", default=False, action="store_true")
     args = parser.parse_args()
 
     clingo_args = []
     if not args.debug:
         clingo_args.append("-Wnone")
+    clingo_args += args.clingo.split()
+
+    if args.output is not None and check_file(args.output) is not None:
+        parser.error(check_file(args.output))
+
+    cache_path = None if args.nocache else args.cache
+
+    if args.planner == "native" and args.external:
+        print_error("Warning: the option -e has no effect with the native planner")
+        args.external = False
 
     if args.domain == "m":
         encoding = "./encodings/pathfindDecentralized-m.lp"
     else:
         encoding = "./encodings/pathfindDecentralized.lp"
 
+    if args.profile is not None:
+        profiler = Profiler(args.profile, args.strategy)
+        profiler.tag_solves([Pathfind, Robot])
+        profiler.start()
+
     if args.benchmark:
         ts = time()
 
     # Initialize the Pathfind object
     if args.strategy == 'sequential':
         pathfind = PathfindDecentralizedSequential(args.instance, encoding, args.domain, not args.nomodel, args.verbose,
-                                                   args.benchmark, args.results, False, args.Highways,
-                                                   clingo_args)
+                                                   args.benchmark, args.results, cache_path, args.external,
+                                                   args.conflicts, args.simulation, args.lookahead, args.processes,
+                                                   args.plancache, args.planner, args.horizon, args.shelves,
+                                                   args.facts, args.output, args.Highways, clingo_args)
     elif args.strategy == 'shortest':
         pathfind = PathfindDecentralizedShortest(args.instance, encoding, args.domain, not args.nomodel, args.verbose,
-                                                 args.benchmark, args.results, False, args.Highways,
-                                                 clingo_args)
+                                                 args.benchmark, args.results, cache_path, args.external,
+                                                 args.conflicts, args.simulation, args.lookahead, args.processes,
+                                                 args.plancache, args.planner, args.horizon, args.shelves, args.facts,
+                                                 args.output, args.Highways, clingo_args)
     elif args.strategy == 'crossing':
         pathfind = PathfindDecentralizedCrossing(args.instance, encoding, args.domain, not args.nomodel, args.verbose,
-                                                 args.benchmark, args.results, False, args.Highways,
-                                                 clingo_args)
+                                                 args.benchmark, args.results, cache_path, args.external,
+                                                 args.conflicts, args.simulation, args.lookahead, args.processes,
+                                                 args.plancache, args.planner, args.horizon, args.shelves,
+                                                 args.crossroads, args.facts, args.output, args.Highways, clingo_args)
     elif args.strategy == 'prioritized':
         if args.domain == "m":
             encoding = "./encodings/pathfindPrioritized-m.lp"
         else:
             encoding = "./encodings/pathfindPrioritized.lp"
         pathfind = PathfindDecentralizedPrioritized(args.instance, encoding, args.domain, not args.nomodel,
-                                                    args.verbose, args.benchmark, args.results, False, args.Highways,
-                                                    clingo_args)
+                                                    args.verbose, args.benchmark, args.results, cache_path,
+                                                    args.external, args.conflicts, args.simulation, args.lookahead,
+                                                    args.processes, args.plancache, args.planner, args.horizon,
+                                                    args.shelves, args.facts, args.output, args.Highways, clingo_args)
     elif args.strategy == 'traffic':
         print_error("Warning: traffic strategy needs special instance in order to work correctly")
         pathfind = PathfindDecentralizedTraffic(args.instance, encoding, args.domain, not args.nomodel, args.verbose,
-                                                args.benchmark, args.results, False, args.Highways, clingo_args)
+                                                args.benchmark, args.results, cache_path, args.external,
+                                                args.conflicts, args.simulation, args.lookahead, args.processes,
+                                                args.plancache, args.planner, args.horizon, args.shelves, args.facts,
+                                                args.output, args.Highways, clingo_args)
     elif args.strategy == 'centralized':
         if args.domain == "m":
             encoding = "./encodings/pathfindCentralized-m.lp"
         else:
             encoding = "./encodings/pathfindCentralized.lp"
         pathfind = PathfindCentralized(args.instance, encoding, args.domain, not args.nomodel, args.verbose,
-                                       args.benchmark, args.results, args.Highways, clingo_args)
-
-    if args.benchmark:
-        plan_length = pathfind.run()
-        tf = time()
-        run_time = tf - ts
-        pathfind.benchmarker.output({"plan_length": plan_length, "run_time": run_time}, "main")
-    else:
-        pathfind.run()
+                                       args.benchmark, args.results, cache_path, args.assignment, args.facts,
+                                       args.output, args.Highways, clingo_args)
+
+    if args.profile is not None:
+        profiler.get_timestep = lambda: pathfind.t
+
+    # the buffered output is also written if the run ends early (sys.exit or a timeout sending SIGTERM)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+    try:
+        if args.benchmark:
+            plan_length = pathfind.run()
+            tf = time()
+            run_time = tf - ts
+            stats = pathfind.get_stats()
+            stats.update({"plan_length": plan_length, "run_time": run_time})
+            stats.update(pathfind.benchmarker.get_summary(run_time))
+            pathfind.benchmarker.output(stats, "main")
+            if args.timesteps:
+                pathfind.benchmarker.output_timesteps()
+        else:
+            pathfind.run()
+    finally:
+        pathfind.output.close()
+    if args.profile is not None:
+        profiler.stop()
+    pathfind.print_stats()
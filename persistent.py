@@ -0,0 +1,51 @@
+from typing import Dict, List, Optional
+
+import clingo
+
+# robot id the persistent program is grounded for (the models are re-based to the robot which planned, see rebase)
+PROGRAM_ROBOT = 0
+
+
+class PersistentProgram(object):
+    def __init__(self, horizon: int) -> None:
+        """Planning program which is grounded once and shared by all robots (used with the flag -e)
+        The inputs of a plan are externals of the robot PROGRAM_ROBOT, before a robot solves the program its externals
+        replace the externals of the robot which solved it before
+        horizon: horizon of the encoding (the program is grounded with a smaller horizon if it is enough, see get_horizon)
+        """
+        self.horizon: int = horizon
+        self.prg: Optional[clingo.Control] = None
+        self.grounded_horizon: int = 0  # horizon of the grounded program (0 if not grounded yet)
+        self.externals: Dict[str, List[clingo.Symbol]] = {}  # externals which are currently set to true
+        self.inputs: int = 0  # number of inputs which were grounded in the program (see get_inputs_id)
+
+    def get_horizon(self, bound: int) -> Optional[int]:
+        """Returns the horizon to ground the program with if a plan needs the horizon bound (None if it is grounded)
+        The program is grounded with twice the horizon which is needed, at least half the horizon of the encoding
+        (and at most all of it), so most plans of a run use the same program"""
+        if bound <= self.grounded_horizon:
+            return None
+        return min(max(2 * bound, self.horizon // 2), self.horizon)
+
+    def set_program(self, prg: clingo.Control, horizon: int) -> None:
+        """Uses the newly grounded program prg (all its externals are false)"""
+        self.prg = prg
+        self.grounded_horizon = horizon
+        self.externals = {}
+
+    def get_inputs_id(self) -> int:
+        """Returns a new id for inputs which are grounded in the program (e.g. the plans of the other robots)"""
+        self.inputs += 1
+        return self.inputs
+
+    def assign(self, externals: Dict[str, List[clingo.Symbol]]) -> None:
+        """Sets the externals (key: kind of input) to true and all other externals which are true to false"""
+        for kind in set(self.externals) | set(externals):
+            old, new = self.externals.get(kind, []), externals.get(kind, [])
+            if old is new:
+                continue
+            for atom in old:
+                self.prg.assign_external(atom, False)
+            for atom in new:
+                self.prg.assign_external(atom, True)
+        self.externals = dict(externals)
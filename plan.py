@@ -0,0 +1,156 @@
+from array import array
+from typing import Iterable, List, Optional, Tuple
+
+import clingo
+import numpy as np
+
+# action codes of the timesteps of a plan
+NONE, MOVE, PICKUP, DELIVER, PUTDOWN = 0, 1, 2, 3, 4
+ACTIONS = {"move": MOVE, "pickup": PICKUP, "deliver": DELIVER, "putdown": PUTDOWN}
+NAMES = {MOVE: "move", PICKUP: "pickup", DELIVER: "deliver", PUTDOWN: "putdown"}
+# position of the timestep in the atoms
+TIME_ARGUMENT = {"move": 2, "pickup": 1, "deliver": 3, "putdown": 1, "pos": 2}
+
+
+class Plan(object):
+    __slots__ = ("rid", "codes", "dx", "dy", "x", "y", "offset", "deliver_args", "shelf")
+
+    def __init__(self, rid: int = -1, model: Iterable[clingo.Symbol] = ()) -> None:
+        """Compact plan of a single robot, built from a model of the planning program
+        For every timestep the action code, the direction of a move and the position (-1 if there is no pos/3 atom)
+        are saved in arrays, index i of the arrays is timestep i + offset of the plan
+        Only the atoms which are needed to execute the plan are kept (actions, pos/3 and chooseShelf/2)
+        An empty plan (no model) is False
+        """
+        self.rid: int = rid
+        self.offset: int = 0
+        self.deliver_args: Tuple[int, int] = (-1, -1)  # product and order of deliver/4
+        self.shelf: int = -1  # shelf of chooseShelf/2 (-1 if the model doesn't contain the atom)
+
+        atoms = []
+        length = 0
+        for atom in model:
+            if atom.name in TIME_ARGUMENT:
+                t = atom.arguments[TIME_ARGUMENT[atom.name]].number
+                atoms.append((t, atom))
+                length = max(length, t + 1)
+            elif atom.name == "chooseShelf":
+                self.shelf = atom.arguments[0].number
+
+        self.codes: array = array("b", bytes(length))
+        self.dx: array = array("b", bytes(length))
+        self.dy: array = array("b", bytes(length))
+        self.x: array = array("h", [-1]) * length
+        self.y: array = array("h", [-1]) * length
+        for t, atom in atoms:
+            if atom.name == "pos":
+                self.x[t] = atom.arguments[0].arguments[0].number
+                self.y[t] = atom.arguments[0].arguments[1].number
+                continue
+            self.codes[t] = ACTIONS[atom.name]
+            if atom.name == "move":
+                self.dx[t] = atom.arguments[0].arguments[0].number
+                self.dy[t] = atom.arguments[0].arguments[1].number
+            elif atom.name == "deliver":
+                self.deliver_args = (atom.arguments[0].number, atom.arguments[1].number)
+
+    def __bool__(self) -> bool:
+        return len(self.codes) > 0
+
+    def __len__(self) -> int:
+        """Number of timesteps of the plan (including timestep 0)"""
+        return len(self.codes)
+
+    def get_code(self, t: int) -> int:
+        i = t - self.offset
+        if 0 <= i < len(self.codes):
+            return self.codes[i]
+        return NONE
+
+    def get_move(self, t: int) -> Optional[Tuple[int, int]]:
+        """Returns the direction of the move at timestep t (None if the robot doesn't move)"""
+        if self.get_code(t) != MOVE:
+            return None
+        return self.dx[t - self.offset], self.dy[t - self.offset]
+
+    def get_action(self, t: int) -> Optional[clingo.Symbol]:
+        """Returns the action atom at timestep t (None if there is no action)"""
+        code = self.get_code(t)
+        if code == MOVE:
+            return clingo.Function("move", [(self.dx[t - self.offset], self.dy[t - self.offset]), self.rid, t])
+        if code == DELIVER:
+            return clingo.Function("deliver", [self.deliver_args[0], self.deliver_args[1], self.rid, t])
+        if code != NONE:
+            return clingo.Function(NAMES[code], [self.rid, t])
+        return None
+
+    def get_last(self, code: int) -> int:
+        """Returns the last timestep with the action code (-1 if the action is not in the plan)"""
+        for i in range(len(self.codes) - 1, -1, -1):
+            if self.codes[i] == code:
+                return i + self.offset
+        return -1
+
+    def get_moves(self, t: int) -> int:
+        """Returns the number of consecutive moves from timestep t on"""
+        codes = self.codes[max(0, t - self.offset):].tobytes()
+        return len(codes) - len(codes.lstrip(bytes([MOVE])))
+
+    def get_directions(self, t: int, length: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the directions of the moves in the length timesteps from t on (0 if the robot doesn't move),
+        the plan ends at the first timestep without action"""
+        i = max(0, t - self.offset)
+        codes = np.frombuffer(self.codes, dtype=np.int8)[i:i + length]
+        end = np.argmin(codes != NONE) if NONE in codes else len(codes)
+        move = codes[:end] == MOVE
+        dx, dy = np.zeros(length, dtype=np.int64), np.zeros(length, dtype=np.int64)
+        dx[:end][move] = np.frombuffer(self.dx, dtype=np.int8)[i:i + end][move]
+        dy[:end][move] = np.frombuffer(self.dy, dtype=np.int8)[i:i + end][move]
+        return dx, dy
+
+    def shift(self, start: int) -> "Plan":
+        """Returns the plan with timestep start mapped to timestep 0 (the arrays are shared, O(1))"""
+        plan = Plan.__new__(Plan)
+        plan.rid, plan.codes, plan.dx, plan.dy, plan.x, plan.y = self.rid, self.codes, self.dx, self.dy, self.x, self.y
+        plan.deliver_args, plan.shelf = self.deliver_args, self.shelf
+        plan.offset = self.offset - start
+        return plan
+
+    def insert(self, t: int, length: int, moves: List[Tuple[int, int, int]]) -> "Plan":
+        """Returns a new plan where length timesteps are inserted before timestep t
+        (the actions from t on are done length timesteps later)
+        moves: (timestep, dx, dy) of the moves which are added to the new plan (e.g. dodging a conflict)
+        """
+        i = max(0, min(t - self.offset, len(self.codes)))
+        plan = self.shift(0)
+        plan.codes = self.codes[:i] + array("b", bytes(length)) + self.codes[i:]
+        plan.dx = self.dx[:i] + array("b", bytes(length)) + self.dx[i:]
+        plan.dy = self.dy[:i] + array("b", bytes(length)) + self.dy[i:]
+        plan.x = self.x[:i] + array("h", [-1]) * length + self.x[i:]
+        plan.y = self.y[:i] + array("h", [-1]) * length + self.y[i:]
+        for move_t, dx, dy in moves:
+            j = move_t - plan.offset
+            if j >= len(plan.codes):
+                extension = j + 1 - len(plan.codes)
+                plan.codes.extend(bytes(extension))
+                plan.dx.extend(bytes(extension))
+                plan.dy.extend(bytes(extension))
+                plan.x.extend([-1] * extension)
+                plan.y.extend([-1] * extension)
+            plan.codes[j], plan.dx[j], plan.dy[j] = MOVE, dx, dy
+        return plan
+
+    def get_atoms(self, names: Tuple[str, ...] = ("pos", "move", "pickup", "deliver", "putdown"),
+                  start: int = 0) -> List[clingo.Symbol]:
+        """Converts the plan back to atoms (grouped by name in the given order, timesteps from start on)"""
+        atoms = []
+        first = max(0, start - self.offset)
+        for name in names:
+            for i in range(first, len(self.codes)):
+                t = i + self.offset
+                if name == "pos":
+                    if self.x[i] != -1:
+                        atoms.append(clingo.Function("pos", [(self.x[i], self.y[i]), self.rid, t]))
+                elif self.codes[i] == ACTIONS[name]:
+                    atoms.append(self.get_action(t))
+        return atoms
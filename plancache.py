@@ -0,0 +1,55 @@
+from collections import OrderedDict
+from typing import List, Optional
+
+import clingo
+
+# position of the robot argument in the atoms of a plan
+ROBOT_ARGUMENT = {"action": 0, "putdown": 0, "pickup": 0, "carries": 0, "deliver": 2, "goal": 1, "move": 1, "pos": 1,
+                  "chooseShelf": 1}
+
+
+class PlanCache(object):
+    def __init__(self, size: int) -> None:
+        """LRU cache of plans (models of the planning program), shared by all robots
+        key: canonical form of the planning inputs (see Robot.get_plan_key)
+        The plans are saved together with the robot and order they were found for,
+        so they can be re-based to other robots and orders (plans always start at timestep 0)
+        """
+        self.size: int = size
+        self.plans: OrderedDict = OrderedDict()
+
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def get(self, key, rid: int, order: List[int]) -> Optional[List[clingo.Symbol]]:
+        """Returns the plan for key re-based to robot rid and the order (None if the plan is not cached)
+        An empty list means that no plan exists for these inputs
+        """
+        if key not in self.plans:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.plans.move_to_end(key)
+
+        model, cached_rid, cached_order = self.plans[key]
+        if cached_rid == rid and cached_order == order:
+            return list(model)
+        return [rebase(atom, rid, order) for atom in model]
+
+    def put(self, key, model: List[clingo.Symbol], rid: int, order: List[int]) -> None:
+        self.plans[key] = (list(model), rid, list(order))
+        self.plans.move_to_end(key)
+        if len(self.plans) > self.size:
+            self.plans.popitem(last=False)
+
+
+def rebase(atom: clingo.Symbol, rid: int, order: List[int]) -> clingo.Symbol:
+    """Replaces the robot (and for deliver the product and order) in an atom of a plan"""
+    if atom.name not in ROBOT_ARGUMENT:
+        return atom
+    arguments = list(atom.arguments)
+    arguments[ROBOT_ARGUMENT[atom.name]] = clingo.Number(rid)
+    if atom.name == "deliver":
+        arguments[0] = clingo.Number(order[1])
+        arguments[1] = clingo.Number(order[0])
+    return clingo.Function(atom.name, arguments)
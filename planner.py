@@ -0,0 +1,330 @@
+from instance import Instance
+
+from heapq import heappop, heappush
+from typing import Dict, List, Optional, Set, Tuple
+
+import clingo
+
+
+def get_horizon(instance: Instance, domain: str, prioritized: bool) -> int:
+    """Returns the horizon of the planning encoding (horizonPrioritized.lp or horizon-m.lp)"""
+    size_x = max([x for _, x, _ in instance.nodes], default=0)
+    size_y = max([y for _, _, y in instance.nodes], default=0)
+    if prioritized and domain == "b":
+        return 2 * size_x + 2 * size_y + max(size_x, size_y) // 2
+    return size_x + size_y + max(size_x, size_y) // 2
+
+
+def read_edges(instance: Instance) -> Dict[Tuple[int, int], List[Tuple[Tuple[int, int], Tuple[int, int]]]]:
+    """Returns the edges of the nextto/3 graph, key: node, value: [(direction, node)] (sorted)"""
+    edges = {}
+    for atom in instance.facts:
+        if atom.name == "nextto":
+            node = (atom.arguments[0].arguments[0].number, atom.arguments[0].arguments[1].number)
+            direction = (atom.arguments[1].arguments[0].number, atom.arguments[1].arguments[1].number)
+            target = (atom.arguments[2].arguments[0].number, atom.arguments[2].arguments[1].number)
+            edges.setdefault(node, []).append((direction, target))
+    for node in edges:
+        edges[node].sort()
+    return edges
+
+
+def read_highways(instance: Instance, highways: bool) -> Set[Tuple[int, int]]:
+    """Returns all highway positions (see input.lp, the start positions of the robots are also used as highways)"""
+    positions = {(x, y) for _, x, y in instance.highways + instance.robots}
+    if highways:
+        blocked = {(x, y) for _, x, y in instance.shelves + instance.pickingstations}
+        positions |= {(x, y) for _, x, y in instance.nodes if (x, y) not in blocked}
+    return positions
+
+
+class GraphDistances(object):
+    def __init__(self, instance: Instance, highways: bool) -> None:
+        """Shortest path distances in the nextto/3 graph for robots which only move onto highways and their goals"""
+        # reversed edges for the search from the goals, key: node, value: [node]
+        self.predecessors: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        for node, edges in read_edges(instance).items():
+            for _, target in edges:
+                self.predecessors.setdefault(target, []).append(node)
+        self.highways: Set[Tuple[int, int]] = read_highways(instance, highways)
+        # key: (goal, goals of the robot), value: distances to the goal
+        self.distances: Dict[tuple, Dict[Tuple[int, int], int]] = {}
+
+    def get(self, goal: Tuple[int, int], goal_nodes: Tuple[Tuple[int, int], ...]) -> Dict[Tuple[int, int], int]:
+        """Returns the distances of all nodes to goal, goal_nodes: goals of the robot (sorted)"""
+        key = (goal, goal_nodes)
+        if key not in self.distances:
+            distances = {goal: 0}
+            queue = [goal]
+            for node in queue:
+                if node != goal and node not in self.highways and node not in goal_nodes:
+                    # the robot can start on the node, but never move onto it
+                    continue
+                for predecessor in self.predecessors.get(node, []):
+                    if predecessor not in distances:
+                        distances[predecessor] = distances[node] + 1
+                        queue.append(predecessor)
+            self.distances[key] = distances
+        return self.distances[key]
+
+
+class AdaptiveHorizon(object):
+    def __init__(self, instance: Instance, domain: str, highways: bool, prioritized: bool, distance: str) -> None:
+        """Horizons for solving the planning program of a single robot with an adaptive horizon:
+        the program is solved with a horizon given by bound/1, starting with a lower bound of the plan length,
+        and the horizon is extended while there is no plan (up to the horizon of the encoding)
+        distance: manhattan or graph (shortest paths on highways in the nextto/3 graph) for the lower bound
+        """
+        self.domain: str = domain
+        self.prioritized: bool = prioritized
+        self.horizon: int = get_horizon(instance, domain, prioritized)
+
+        self.graph: Optional[GraphDistances] = GraphDistances(instance, highways) if distance == "graph" else None
+
+    def get_bounds(self, start: List[int], goals, pickupdone: bool, deliverdone: bool) -> List[int]:
+        """Returns the horizons which are tried one after another for a plan
+        starting with the lower bound of the plan length, the distance to the horizon is doubled in each step
+        (the last horizon is the horizon of the encoding)
+        """
+        goal = {k: tuple(position) for position, k in goals}
+        if self.prioritized and self.domain == "b" and 1 in goal and 2 in goal:
+            goal[3] = goal[1]
+
+        targets = []
+        if not pickupdone and 1 in goal:
+            targets.append(goal[1])
+        if self.domain == "b":
+            if 2 in goal and not deliverdone:
+                targets.append(goal[2])
+            if 3 in goal:
+                targets.append(goal[3])
+
+        # every target needs an action, the last action can be at timestep horizon+1
+        bound = len(targets) - 1
+        position = (start[0], start[1])
+        goal_nodes = tuple(sorted(set(goal.values())))
+        for target in targets:
+            if self.graph is not None:
+                distance = self.graph.get(target, goal_nodes).get(position)
+                if distance is None:
+                    return [self.horizon]
+                bound += distance
+            else:
+                bound += abs(target[0] - position[0]) + abs(target[1] - position[1])
+            position = target
+
+        bounds = []
+        step = 1
+        while bound < self.horizon:
+            bounds.append(max(bound, 1))
+            bound += step
+            step *= 2
+        bounds.append(self.horizon)
+        return bounds
+
+
+class NativePlanner(object):
+    def __init__(self, instance: Instance, domain: str, highways: bool, prioritized: bool) -> None:
+        """Planner backend which finds the plan of a single robot without clingo
+        A* search over the nextto/3 graph of the instance, following the rules of pathfindDecentralized.lp and
+        pathfindPrioritized.lp (and the -m versions):
+        robots only move onto highways and their own goals, never turn back directly, the actions (pickup, deliver,
+        putdown) are done as soon as the goal is reached and the plan has to end within the horizon of the encoding
+        The number of timesteps is minimized (the encodings minimize the number of moves, which only differs in ties)
+        """
+        self.domain: str = domain
+        self.prioritized: bool = prioritized
+
+        # key: node, value: [(direction, node)]
+        self.edges: Dict[Tuple[int, int], List[Tuple[Tuple[int, int], Tuple[int, int]]]] = read_edges(instance)
+
+        self.nodes: Set[Tuple[int, int]] = {(x, y) for _, x, y in instance.nodes}
+        self.shelves: Set[Tuple[int, int]] = {(x, y) for _, x, y in instance.shelves}
+        self.stations: Set[Tuple[int, int]] = {(x, y) for _, x, y in instance.pickingstations}
+        self.highways: Set[Tuple[int, int]] = read_highways(instance, highways)
+
+        self.horizon: int = get_horizon(instance, domain, prioritized)
+
+    def plan(self, rid: int, start: List[int], goals, order: List[int], pickupdone: bool, deliverdone: bool,
+             blocked, shelf: int, reserved: Optional[Set] = None, reserved_moves: Optional[Set] = None,
+             blocked_all=()) -> List[clingo.Symbol]:
+        """Returns the plan of robot rid in the form of the model of the planning program (empty if there is no plan)
+        goals: [(position, number of goal)] (see Robot.get_goals), blocked: positions which are blocked at timestep 1
+        reserved: {(position, timestep)} of the other robots, reserved_moves: {(position, direction, timestep)} moves of
+        the other robots onto position, blocked_all: positions which can never be used (only prioritized strategy)
+        """
+        reserved = reserved or set()
+        reserved_moves = reserved_moves or set()
+        b = self.domain == "b"
+
+        goal = {k: tuple(position) for position, k in goals}
+        if self.prioritized and b and 1 in goal and 2 in goal:
+            goal[3] = goal[1]
+        goal_nodes = set(goal.values())
+        station_goal = goal.get(2)
+        shelf_goal = goal.get(1)
+        # the actions which are needed to reach the goals
+        need_deliver = b and 2 in goal
+        need_putdown = b and 3 in goal
+
+        def allowed(position, t, carries) -> bool:
+            """Checks the constraints for the robot being on position at timestep t"""
+            if position not in self.nodes or position in blocked_all:
+                return False
+            if position in self.stations and (position != station_goal or not carries):
+                return False
+            if t > 0:
+                if position in self.shelves and position != shelf_goal:
+                    return False
+                if t == 1 and position in blocked:
+                    return False
+                if (position, t) in reserved:
+                    return False
+            return True
+
+        def estimate(position, picked, delivered, putdone) -> int:
+            """Lower bound of the timesteps until all goals are reached (distance through the goals and actions)"""
+            targets = []
+            if not picked:
+                targets.append(goal[1])
+            if need_deliver and not delivered:
+                targets.append(goal[2])
+            if need_putdown and not putdone:
+                targets.append(goal[3])
+            estimate = len(targets)
+            for target in targets:
+                estimate += abs(target[0] - position[0]) + abs(target[1] - position[1])
+                position = target
+            return estimate
+
+        start = (start[0], start[1])
+        carries = b and pickupdone
+        if 1 not in goal or not allowed(start, 0, carries):
+            return []
+
+        # state: (position, carries, picked, delivered, putdone, last move, last action)
+        # (position is None after an action at timestep horizon+1)
+        state = (start, carries, pickupdone, deliverdone, False, None, ("pickup" if pickupdone else "") +
+                 ("deliver" if deliverdone else ""))
+        # nodes of the search: (timestep, state, parent, step)
+        nodes = [(0, state, -1, None)]
+        queue = [(estimate(start, pickupdone, deliverdone, False), 0, 0)]
+        # with reservations the constraints depend on the timestep, so states are only equal at the same timestep
+        visited = {state if not reserved else (state, 0)}
+        end = -1
+        while queue:
+            _, _, index = heappop(queue)
+            t, state, _, _ = nodes[index]
+            position, carries, picked, delivered, putdone, last_move, last_action = state
+
+            # the action which has to be done at the next timestep (if any)
+            action = ""
+            if position == shelf_goal and not carries and "pickup" not in last_action and \
+                    "putdown" not in last_action:
+                action = "pickup"
+            elif b and position == station_goal and picked and "deliver" not in last_action:
+                action = "deliver"
+            elif need_putdown and position == goal[3] and delivered and carries:
+                action = "putdown"
+
+            if not action and picked and (delivered or not need_deliver) and (putdone or not need_putdown):
+                end = index
+                break
+            if position is None:
+                continue
+
+            successors = []
+            if action:
+                next_carries = b and (carries or action == "pickup") and action != "putdown"
+                next_state = (position if t < self.horizon else None, next_carries, picked or action == "pickup",
+                              delivered or action == "deliver", putdone or action == "putdown", None, action)
+                if t >= self.horizon or allowed(position, t + 1, next_carries):
+                    successors.append((next_state, action))
+            elif t < self.horizon:
+                for direction, target in self.edges.get(position, []):
+                    if last_move == (-direction[0], -direction[1]):
+                        continue
+                    if target not in self.highways and target not in goal_nodes:
+                        continue
+                    if not allowed(target, t + 1, carries) or \
+                            (position, (-direction[0], -direction[1]), t + 1) in reserved_moves:
+                        continue
+                    successors.append(((target, carries, picked, delivered, putdone, direction, ""), direction))
+
+            for next_state, step in successors:
+                key = next_state if not reserved else (next_state, t + 1)
+                if key in visited:
+                    continue
+                visited.add(key)
+                nodes.append((t + 1, next_state, index, step))
+                if next_state[0] is None:
+                    remaining = 0
+                else:
+                    remaining = estimate(next_state[0], next_state[2], next_state[3], next_state[4])
+                heappush(queue, (t + 1 + remaining, -(t + 1), len(nodes) - 1))
+
+        if end == -1:
+            return []
+
+        # timesteps and steps of the plan
+        steps = []
+        while nodes[end][2] != -1:
+            steps.append((nodes[end][0], nodes[end][1][0], nodes[end][3]))
+            end = nodes[end][2]
+        steps.reverse()
+
+        return self.get_model(rid, start, steps, goal, order, pickupdone, deliverdone, blocked, shelf)
+
+    def get_model(self, rid: int, start, steps, goal, order: List[int], pickupdone: bool, deliverdone: bool,
+                  blocked, shelf: int) -> List[clingo.Symbol]:
+        """Returns the atoms which are shown by the encodings for the steps of a plan (in the same order)"""
+        actions = []
+        pickups = []
+        positions = [clingo.Function("pos", [start, rid, 0])]
+        moves = []
+        carries = []
+        delivers = []
+        putdowns = []
+
+        if pickupdone or deliverdone:
+            actions.append(clingo.Function("action", [rid, 0]))
+        if pickupdone:
+            pickups.append(clingo.Function("pickup", [rid, 0]))
+        if deliverdone:
+            delivers.append(clingo.Function("deliver", [order[1], order[0], rid, 0]))
+
+        carrying = self.domain == "b" and pickupdone
+        if carrying:
+            carries.append(clingo.Function("carries", [rid, 0]))
+        step_at = {t: step for t, _, step in steps}
+        for t, position, step in steps:
+            if position is not None:
+                positions.append(clingo.Function("pos", [position, rid, t]))
+            if isinstance(step, tuple):
+                moves.append(clingo.Function("move", [step, rid, t]))
+                continue
+            if t <= self.horizon:
+                actions.append(clingo.Function("action", [rid, t]))
+            if step == "pickup":
+                pickups.append(clingo.Function("pickup", [rid, t]))
+            elif step == "deliver":
+                delivers.append(clingo.Function("deliver", [order[1], order[0], rid, t]))
+            else:
+                putdowns.append(clingo.Function("putdown", [rid, t]))
+
+        # the robot carries the shelf until it is put down (also after the end of the plan)
+        if self.domain == "b":
+            for t in range(1, self.horizon + 2):
+                if step_at.get(t) == "pickup":
+                    carrying = True
+                elif step_at.get(t) == "putdown":
+                    carrying = False
+                if carrying and (t <= self.horizon or step_at.get(t) == "pickup"):
+                    carries.append(clingo.Function("carries", [rid, t]))
+
+        goal_atoms = [clingo.Function("goal", [goal[k], rid, k]) for k in sorted(goal)]
+        block_atoms = [clingo.Function("block", [position]) for position in blocked]
+        model = actions + pickups + positions + moves + goal_atoms + carries + delivers + putdowns + block_atoms
+        if self.domain == "m":
+            model.append(clingo.Function("chooseShelf", [shelf, rid]))
+        return model
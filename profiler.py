@@ -0,0 +1,74 @@
+import cProfile
+import os
+import sys
+import threading
+from collections import Counter
+from functools import wraps
+from time import sleep
+from typing import Callable, List, Optional
+
+
+class Profiler(object):
+    def __init__(self, path: str, strategy: str, interval: float = 0.001) -> None:
+        """CPU profile of a run, saved as path.pstats (cProfile, e.g. for snakeviz or pstats)
+        and path.collapsed (sampled stacks in the collapsed format of flamegraph.pl / speedscope)
+        The sampled stacks start with the strategy and, during a solve call, the type of solving and the timestep
+        interval: seconds between two samples of the stack of the main thread
+        """
+        self.path: str = path
+        self.strategy: str = strategy
+        self.interval: float = interval
+        self.get_timestep: Callable[[], int] = lambda: 0  # current timestep of the run (set after Pathfind is created)
+
+        self.profile: cProfile.Profile = cProfile.Profile()
+        self.samples: Counter = Counter()  # key: collapsed stack, value: number of samples
+        self.tags: List[str] = []  # frames added to the start of the sampled stacks
+        self.thread: Optional[threading.Thread] = None
+        self.running: bool = False
+        self.main_thread: int = threading.main_thread().ident
+
+    def start(self) -> None:
+        self.running = True
+        self.thread = threading.Thread(target=self.sample, daemon=True)
+        self.thread.start()
+        self.profile.enable()
+
+    def stop(self) -> None:
+        self.profile.disable()
+        self.running = False
+        self.thread.join()
+        self.profile.dump_stats(self.path + ".pstats")
+        with open(self.path + ".collapsed", "w") as f:
+            for stack, count in sorted(self.samples.items()):
+                print(stack + " " + str(count), file=f)
+
+    def sample(self) -> None:
+        """Samples the stack of the main thread until the profiler is stopped (runs in its own thread)"""
+        while self.running:
+            frame = sys._current_frames().get(self.main_thread)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(code.co_name + " (" + os.path.basename(code.co_filename) + ":" +
+                             str(code.co_firstlineno) + ")")
+                frame = frame.f_back
+            stack.reverse()
+            self.samples[";".join([self.strategy] + self.tags + stack)] += 1
+            sleep(self.interval)
+
+    def tag_solves(self, classes: list) -> None:
+        """Replaces the method solve(prg, type) of the classes by a method which tags the samples
+        with the type of solving and the timestep (the classes are only changed when profiling,
+        so there is no overhead otherwise)"""
+        for cls in classes:
+            cls.solve = self.get_tagged_solve(cls.solve)
+
+    def get_tagged_solve(self, solve):
+        @wraps(solve)
+        def tagged_solve(obj, prg, type):
+            self.tags = ["solve " + type, "t=" + str(self.get_timestep())]
+            try:
+                return solve(obj, prg, type)
+            finally:
+                self.tags = []
+        return tagged_solve
@@ -0,0 +1,138 @@
+from benchmark import get_runs, run
+from instance import compile_instance
+
+import argparse
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+# pinned instance sets: (instance patterns, strategies, domains)
+SUITES = {
+    "quick": (["instances/graph/11x6/*.lp"], ["sequential", "shortest", "crossing", "prioritized", "centralized"],
+              ["b", "m"]),
+    "graph": (["instances/graph/16x10/*.lp", "instances/graph/31x16/*.lp"],
+              ["sequential", "shortest", "crossing", "prioritized"], ["b", "m"]),
+    "traffic": (["instances/traffic/21x10/*.lp"], ["traffic"], ["b", "m"]),
+}
+# fixed clingo configuration of all runs
+CLINGO_ARGUMENTS = "--seed=0 --configuration=auto"
+# compared metrics (larger values are worse)
+METRICS = ["plan_length", "wall_time", "solves", "atoms", "rules"]
+
+
+def get_metrics(rows: List[dict]) -> dict:
+    """Metrics of the repetitions of one run: status, makespan, (minimal) wall time, solved programs and grounded size
+    (atoms and rules summed over all solved programs)"""
+    row = min(rows, key=lambda row: row["wall_time"])
+    return {"status": row["status"], "plan_length": row.get("plan_length"), "wall_time": row["wall_time"],
+            "solves": row.get("solves"),
+            "atoms": sum(value for key, value in row.items() if key.startswith("solves_") and key.endswith("_atoms")),
+            "rules": sum(value for key, value in row.items() if key.startswith("solves_") and key.endswith("_rules"))}
+
+
+def compare(baseline: dict, current: dict, tolerances: Dict[str, float]) -> List[tuple]:
+    """Returns the regressions (run, metric, baseline, current) of the current results
+    A metric regresses if it is larger than the baseline by more than the relative tolerance of the metric,
+    a run regresses if it was successful in the baseline but isn't anymore"""
+    regressions = []
+    for key, metrics in sorted(current.items()):
+        if key not in baseline:
+            continue
+        old = baseline[key]
+        if old["status"] == "ok" and metrics["status"] != "ok":
+            regressions.append((key, "status", old["status"], metrics["status"]))
+            continue
+        if metrics["status"] != "ok":
+            continue
+        for metric in METRICS:
+            if old[metric] is None or metrics[metric] is None:
+                continue
+            if metrics[metric] > old[metric] * (1 + tolerances[metric]) + 1e-9:
+                regressions.append((key, metric, old[metric], metrics[metric]))
+    return regressions
+
+
+def format_value(value) -> str:
+    if isinstance(value, float):
+        return str(round(value, 3))
+    return str(value)
+
+
+def print_table(regressions: List[tuple]) -> None:
+    rows = [("run", "metric", "baseline", "current", "change")]
+    for key, metric, old, new in regressions:
+        change = ""
+        if isinstance(old, (int, float)) and old:
+            change = "+" + str(round(100 * (new - old) / old, 1)) + "%"
+        rows.append((key, metric, format_value(old), format_value(new), change))
+    widths = [max(len(row[i]) for row in rows) for i in range(5)]
+    for row in rows:
+        print("  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Runs a pinned benchmark suite and compares the results with a "
+                                                 "stored baseline, exits with 1 if any metric regresses")
+    parser.add_argument("suite", help="instance set: " + ", ".join(SUITES), choices=list(SUITES))
+    parser.add_argument("--baseline", help="baseline file (default: './results/regression/SUITE.json')",
+                        default=None, type=str)
+    parser.add_argument("--update", help="saves the results as new baseline instead of comparing them",
+                        default=False, action="store_true")
+    parser.add_argument("-n", "--repetitions", help="number of runs of each combination, the fastest one is used "
+                                                    "(default: 3)", default=3, type=int)
+    parser.add_argument("-j", "--jobs", help="number of runs at the same time (default: 1, more jobs make the wall "
+                                             "times less reliable)", default=1, type=int)
+    parser.add_argument("-t", "--timeout", help="timeout of a single run in seconds (default: 300)", default=300,
+                        type=float)
+    parser.add_argument("--time-tolerance", help="allowed relative increase of the wall time (default: 0.25)",
+                        default=0.25, type=float)
+    parser.add_argument("--count-tolerance", help="allowed relative increase of the solved programs and the grounded "
+                                                  "atoms and rules (default: 0.05)", default=0.05, type=float)
+    parser.add_argument("--makespan-tolerance", help="allowed relative increase of the makespan (default: 0)",
+                        default=0, type=float)
+    parser.add_argument("-a", "--arguments", help="additional arguments of pathfind.py", default="", type=str)
+    args = parser.parse_args()
+
+    baseline_path = args.baseline or "./results/regression/" + args.suite + ".json"
+    patterns, strategies, domains = SUITES[args.suite]
+    runs = get_runs(patterns, strategies, domains, args.repetitions)
+    arguments = ["--clingo=" + CLINGO_ARGUMENTS, "--cache", str(Path("./cache/").resolve())] + args.arguments.split()
+
+    for instance in sorted({run_args[0] for run_args in runs}):
+        compile_instance(instance, str(Path("./cache/").resolve()), ["-Wnone"])
+
+    results: Dict[str, List[dict]] = {}
+    with ThreadPoolExecutor(args.jobs) as executor:
+        futures = [executor.submit(run, *run_args, arguments, args.timeout, None) for run_args in runs]
+        for i, future in enumerate(futures):
+            row = future.result()
+            key = row["instance"] + " " + row["strategy"] + " " + row["domain"]
+            results.setdefault(key, []).append(row)
+            print(str(i + 1) + "/" + str(len(runs)) + " " + row["status"] + " " + key, file=sys.stderr)
+    current = {key: get_metrics(rows) for key, rows in results.items()}
+
+    if args.update:
+        Path(baseline_path).resolve().parent.mkdir(parents=True, exist_ok=True)
+        with open(baseline_path, "w") as f:
+            print(json.dumps(current, sort_keys=True, indent=4, separators=(',', ': ')), file=f)
+        print("saved baseline of " + str(len(current)) + " runs to " + baseline_path)
+        sys.exit(0)
+
+    if not Path(baseline_path).is_file():
+        print("Error: no baseline " + baseline_path + " (create it with --update)", file=sys.stderr)
+        sys.exit(2)
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    tolerances = {"plan_length": args.makespan_tolerance, "wall_time": args.time_tolerance,
+                  "solves": args.count_tolerance, "atoms": args.count_tolerance, "rules": args.count_tolerance}
+    regressions = compare(baseline, current, tolerances)
+    missing = sorted(set(baseline) - set(current))
+    if missing:
+        print("runs of the baseline which were not run: " + ", ".join(missing))
+    if regressions:
+        print_table(regressions)
+        print(str(len(regressions)) + " regressions in " + str(len(current)) + " runs")
+        sys.exit(1)
+    print("no regressions in " + str(len(current)) + " runs")
@@ -0,0 +1,94 @@
+from plan import MOVE, Plan
+
+import sys
+from typing import Dict, List, Optional, Set, Tuple
+
+import clingo
+
+
+class ReservationTable(object):
+    def __init__(self) -> None:
+        """Space-time reservations of the plans of all robots (prioritized strategy)
+        The plan of each robot is saved together with the timestep at which timestep 0 of the plan takes place,
+        so the table only changes when a robot commits a new plan and not while the robots advance
+        """
+        self.plans: Dict[int, Tuple[Plan, int]] = {}  # key: robot, value: (plan, timestep of the plan start)
+
+        # largest size of the table during the run
+        self.peak_entries: int = 0
+        self.peak_bytes: int = 0
+
+    def commit(self, rid: int, plan: Plan, t: int) -> None:
+        """Saves the plan of robot rid which was found at timestep t (nothing changes if the plan is already saved)"""
+        if rid in self.plans and self.plans[rid][0] is plan:
+            return
+        if plan:
+            self.plans[rid] = (plan, t)
+            self.update_size()
+        else:
+            self.release(rid)
+
+    def release(self, rid: int) -> None:
+        """Removes the plan of robot rid (the robot has no reservations until it commits a new plan)"""
+        self.plans.pop(rid, None)
+
+    def advance(self, t: int) -> None:
+        """Removes the plans which end before timestep t"""
+        finished = [rid for rid, (plan, start) in self.plans.items() if start + len(plan) <= t]
+        for rid in finished:
+            del self.plans[rid]
+
+    def get_plan(self, rid: int, t: int) -> Optional[Plan]:
+        """Returns the plan of robot rid with timestep t mapped to timestep 0
+        (None if the robot has no reservations from timestep t on)"""
+        if rid not in self.plans:
+            return None
+        plan, start = self.plans[rid]
+        plan = plan.shift(t - start)
+        for i in range(max(0, -plan.offset), len(plan)):
+            if plan.x[i] != -1 or (plan.codes[i] == MOVE and i + plan.offset > 0):
+                return plan
+        return None
+
+    def update_size(self) -> None:
+        entries = sum(len(plan) for plan, _ in self.plans.values())
+        size = sys.getsizeof(self.plans)
+        for plan, _ in self.plans.values():
+            size += sys.getsizeof(plan) + sum(sys.getsizeof(getattr(plan, name)) for name in
+                                              ["codes", "dx", "dy", "x", "y"])
+        self.peak_entries = max(self.peak_entries, entries)
+        self.peak_bytes = max(self.peak_bytes, size)
+
+
+def get_reservations(plans: List[Plan]) -> Tuple[Set[tuple], Set[tuple]]:
+    """Returns the positions {(position, timestep)} and moves {(position moved onto, direction, timestep)}
+    of the plans of the other robots (as returned by ReservationTable.get_plan)"""
+    reserved = set()
+    reserved_moves = set()
+    for plan in plans:
+        for i in range(max(0, -plan.offset), len(plan)):
+            t = i + plan.offset
+            if plan.x[i] != -1:
+                reserved.add(((plan.x[i], plan.y[i]), t))
+                if plan.codes[i] == MOVE and t > 0:
+                    reserved_moves.add(((plan.x[i], plan.y[i]), (plan.dx[i], plan.dy[i]), t))
+    return reserved, reserved_moves
+
+
+def get_facts(plans: List[Plan]) -> List[clingo.Symbol]:
+    """Returns the pos/3 and move/3 facts of the plans of the other robots for the planning program"""
+    facts = []
+    for plan in plans:
+        facts += plan.get_atoms(("pos",))
+        facts += [atom for atom in plan.get_atoms(("move",)) if atom.arguments[2].number > 0]
+    return facts
+
+
+def get_key(plans: List[Plan]) -> tuple:
+    """Canonical form of the reservations (part of the key of the plan cache)"""
+    key = []
+    for plan in plans:
+        first = max(0, -plan.offset)
+        key.append((plan.rid, plan.offset + first) + tuple(getattr(plan, name)[first:].tobytes() for name in
+                                                           ["codes", "dx", "dy", "x", "y"]))
+    return tuple(sorted(key))
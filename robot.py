@@ -1,6 +1,12 @@
-from benchmarker import solve
+from benchmarker import solve, timed
+from facts import FactBuilder, to_text
+from persistent import PROGRAM_ROBOT
+from plan import DELIVER, PICKUP, PUTDOWN, Plan
+from plancache import rebase
+from reservations import get_facts, get_key, get_reservations
 
-from typing import List
+from array import array
+from typing import List, Optional, Tuple
 
 import clingo
 
@@ -13,6 +19,9 @@ class Robot(object):
         Clingo object"""
         # inputs
         self.id = rid
+        # shared world state, position and next position of the robot are also saved in the world
+        self.world = None
+        self.world_index = -1
         self.start = list(start)
         self.pos = list(start)
 
@@ -23,7 +32,9 @@ class Robot(object):
 
         self.next_pos = [-1, -1]
 
-        self.state = []  # State of the world around the robot as 2D Matrix
+        # State of the positions the robot can move onto, key: position, value: 1=free, 0=blocked
+        # (all other positions are assumed to be free)
+        self.state = {}
         self.t = -1
 
         self.order = [-1, -1, -1]
@@ -43,20 +54,24 @@ class Robot(object):
         self.benchmark = benchmark
         self.benchmarker = benchmarker
 
-        # when internal is used clingo object initialized before solve
-        if self.external:
-            self.prg = clingo.Control(self.clingo_arguments)
-            self.prg.load(encoding)
-            self.prg.load(instance)
-            parts = [("base", []), ("decentralized", [self.id])]
-            if self.highways:
-                parts.append(("highways", []))
-            self.prg.ground(parts)
+        self.plans = 0  # number of times the planning program was solved
+        self.plan_cache = None  # PlanCache shared by all robots (None if plans are not cached)
+        self.planner = None  # NativePlanner used instead of the planning program (None if clingo is used)
+        self.shelf_chooser = None  # ShelfChooser used instead of goals.lp (None if clingo is used)
+        self.horizon = None  # AdaptiveHorizon for the planning program (None if the horizon of the encoding is used)
+        self.extensions = 0  # number of times the horizon was extended because there was no plan
+        self.groundings = 0  # number of times the planning program was grounded
+        self.facts = FactBuilder()  # adds the inputs to the programs (shared by all robots)
+
+        # when externals are used all robots solve one PersistentProgram which is grounded for the first plan
+        # (it is only grounded again if a plan needs a larger horizon, see ground_persistent)
+        self.program = None  # PersistentProgram shared by all robots (None if externals are not used)
+        self.externals = {}  # inputs of the next plan as externals of the program, key: kind of input, value: atoms
 
         self.plan_finished = True
         self.waiting = False  # The robot currently does/does not need to wait
 
-        self.model = []
+        self.model = Plan()
         self.plan_length = -1
 
         self.next_action = clingo.Function("", [])
@@ -67,22 +82,65 @@ class Robot(object):
         else:
             return solve(prg)
 
+    def ground_program(self, prg: clingo.Control, parts, type: str) -> None:
+        if self.benchmark:
+            self.benchmarker.ground(prg, parts, type)
+        else:
+            prg.ground(parts)
+
+    @property
+    def pos(self):
+        return self._pos
+
+    @pos.setter
+    def pos(self, pos):
+        self._pos = pos
+        if self.world is not None:
+            self.world.positions[self.world_index] = pos
+
+    @property
+    def next_pos(self):
+        return self._next_pos
+
+    @next_pos.setter
+    def next_pos(self, next_pos):
+        self._next_pos = next_pos
+        if self.world is not None:
+            self.world.next_positions[self.world_index] = next_pos
+
+    def set_world(self, world) -> None:
+        """Use the shared world state (the position and next position are saved in its arrays)"""
+        self.world = world
+        self.world_index = world.index[self.id]
+        self.pos = self.pos
+        self.next_pos = self.next_pos
+
+    def ground(self, parts) -> None:
+        """Ground the planning program and count the grounding pass"""
+        self.ground_program(self.prg, parts, "plan")
+        self.groundings += 1
+
+    @timed("goals")
     def generate_goals(self) -> bool:
+        """Chooses the shelf for the current order and sets the goals, returns False if no shelf is available"""
+        if self.shelf_chooser is not None:
+            choice = self.shelf_chooser.choose(self.pos, self.order, self.available_shelves)
+            if choice is None:
+                return False
+            self.shelf, self.goalA, self.goalB = choice
+            self.goalC = self.goalA
+            return True
+
         self.prg_goals = clingo.Control(self.clingo_arguments)
-        self.prg_goals.load(self.instance)
+        self.instance.load(self.prg_goals)
         self.prg_goals.load("./encodings/goals.lp")
 
-        self.prg_goals.add("base", [], "start((" + str(self.pos[0]) + "," + str(self.pos[1]) + ")," + str(self.id) +
-                           ").")
-        self.prg_goals.add("base", [], "robot(" + str(self.id) + ").")
-
-        for shelf in self.available_shelves:
-            self.prg_goals.add("base", [], "available(" + str(shelf) + ").")
+        facts = [clingo.Function("start", [(self.pos[0], self.pos[1]), self.id]), clingo.Function("robot", [self.id])]
+        facts += [clingo.Function("available", [shelf]) for shelf in self.available_shelves]
+        facts.append(clingo.Function("order", [self.order[1], self.order[2], self.order[0], self.id]))
+        self.facts.add(self.prg_goals, facts)
 
-        self.prg_goals.add("base", [], "order(" + str(self.order[1]) + ", " + str(self.order[2]) + "," +
-                           str(self.order[0]) + "," + str(self.id) + ").")
-
-        self.prg_goals.ground([("base", [])])
+        self.ground_program(self.prg_goals, [("base", [])], "assignment")
         model = self.solve(self.prg_goals, "assignment")
         if model:
             for atom in model:
@@ -100,111 +158,240 @@ class Robot(object):
 
         return True
 
+    def get_goals(self):
+        """Returns the goals for the next plan as a list of (position, number of goal)
+        Goals which were already reached in a previous plan are included as well"""
+        goals = [(self.goalA, 1)]
+        self.current_goal = 1
+        if self.pickupdone:
+            goals.append((self.goalB, 2))
+            self.current_goal = 2
+        if self.deliverdone:
+            goals.append((self.goalC, 3))
+            self.current_goal = 3
+        return goals
+
+    def get_blocked(self):
+        """Returns all positions which are marked as blocked in the state"""
+        return [pos for pos in sorted(self.state) if not self.state[pos]]
+
     def add_inputs(self) -> bool:
+        # assign a shelf and generate the goals
+        if self.shelf == -1:
+            if not self.generate_goals():
+                # no shelf could be assigned
+                return False
+
         if self.external:
-            # Assign externals before solving
-            self.prg.assign_external(clingo.Function("start", [(self.start[0], self.start[1]), self.id]), False)
-            self.prg.assign_external(clingo.Function("start", [(self.pos[0], self.pos[1]), self.id]), True)
-
-            self.prg.assign_external(clingo.Function("pickup", [self.id, 0]), self.pickupdone)
-            self.prg.assign_external(clingo.Function("deliver", [self.order[1], self.order[0], self.id, 0]),
-                                     self.deliverdone)
-
-            if self.shelf != -1:
-                for shelf in self.available_shelves:
-                    self.prg.assign_external(clingo.Function("available", [shelf]), False)
-                self.prg.assign_external(clingo.Function("available", [self.shelf]), True)
-
-            for i in range(len(self.state)):
-                for j in range(len(self.state[0])):
-                    self.prg.assign_external(clingo.Function("block", [(i + 1, j + 1)]), not self.state[i][j])
-        else:  # if the flag -i is used
-            # Add all externals directly as literals instead and then ground
-            # assign a shelf and generate the goals
-            if self.shelf == -1:
-                if not self.generate_goals():
-                    # no shelf could be assigned
-                    return False
-
-            self.prg = clingo.Control(self.clingo_arguments)
-            self.prg.load(self.encoding)
-            self.prg.load(self.instance)
-
-            self.prg.add("base", [], "start((" + str(self.pos[0]) + "," + str(self.pos[1]) + ")," + str(self.id) + ").")
-
-            # add the goals
-            self.prg.add("base", [], "goal(" + str(self.goalA) + "," + str(self.id) + ", 1).")
-            self.current_goal = 1
-            if self.pickupdone:
-                self.prg.add("base", [], "pickup(" + str(self.id) + ",0).")
-                self.prg.add("base", [], "goal(" + str(self.goalB) + "," + str(self.id) + ", 2).")
-                self.current_goal = 2
-            if self.deliverdone:
-                self.prg.add("base", [], "deliver(" + str(self.order[1]) + "," + str(self.order[0]) + "," +
-                             str(self.id) + ",0).")
-                self.prg.add("base", [], "goal(" + str(self.goalC) + "," + str(self.id) + ", 3).")
-                self.current_goal = 3
-
-            for i in range(len(self.state)):
-                for j in range(len(self.state[0])):
-                    if not (self.state[i][j]):
-                        self.prg.add("base", [], "block((" + str(i + 1) + ", " + str(j + 1) + ")).")
-
-            self.prg.add("base", [], "available(" + str(self.shelf) + ").")
-
-            self.prg.add("base", [], "order(" + str(self.order[1]) + ", " + str(self.order[2]) + "," +
-                         str(self.order[0]) + "," + str(self.id) + ").")
+            # the inputs are the same as the facts without externals (for the robot of the persistent program)
+            self.externals["inputs"] = Robot.get_inputs(self, PROGRAM_ROBOT)
 
         return True
 
+    def ground_persistent(self, horizon: int) -> None:
+        """Grounds the persistent planning program with the horizon (used with the flag -e)
+        Every plan is restricted to its own horizon by the externals late/1 (see assign_inputs)"""
+        prg = clingo.Control(self.clingo_arguments)
+        prg.load(self.encoding)
+        self.instance.load(prg)
+        self.facts.add(prg, [clingo.Function("bound", [horizon])])
+        parts = [("base", []), ("decentralized", [PROGRAM_ROBOT])]
+        if self.highways:
+            parts.append(("highways", []))
+        self.ground_program(prg, parts, "plan")
+        self.groundings += 1
+        self.program.set_program(prg, horizon)
+
+    def assign_inputs(self, bound: int) -> None:
+        """Sets the externals of the inputs in the persistent program for a plan with the horizon bound
+        (used with the flag -e, the externals of the robot which solved the program before are replaced)"""
+        horizon = self.program.get_horizon(bound)
+        if horizon is not None:
+            self.ground_persistent(horizon)
+        self.ground_inputs()
+        self.externals["late"] = [clingo.Function("late", [t])
+                                  for t in range(bound + 1, self.program.grounded_horizon + 1)]
+        self.program.assign(self.externals)
+
+    def ground_inputs(self) -> None:
+        """Grounds the inputs which are not externals in the persistent program (used with the flag -e)"""
+        pass
+
+    def create_program(self, bound: Optional[int] = None) -> None:
+        """Creates the planning program with all inputs as facts (used if the flag -e is not used)
+        bound: horizon of the program (None for the horizon of the encoding)"""
+        self.prg = clingo.Control(self.clingo_arguments)
+        self.prg.load(self.encoding)
+        self.instance.load(self.prg)
+        inputs = self.get_inputs()
+        if bound is not None:
+            inputs.append(clingo.Function("bound", [bound]))
+        self.facts.add(self.prg, inputs)
+
+    def get_bounds(self) -> List[Optional[int]]:
+        """Returns the horizons which are tried one after another for the next plan"""
+        if self.horizon is None:
+            return [None]
+        return self.horizon.get_bounds(self.pos, self.get_goals(), self.pickupdone, self.deliverdone)
+
+    def get_inputs(self, rid: Optional[int] = None) -> List[clingo.Symbol]:
+        """Returns the inputs of the planning program as facts (or the externals which are set with the flag -e)
+        rid: robot of the inputs (None for the robot itself)"""
+        if rid is None:
+            rid = self.id
+        inputs = [clingo.Function("start", [(self.pos[0], self.pos[1]), rid])]
+
+        # add the goals
+        for goal, k in self.get_goals():
+            inputs.append(clingo.Function("goal", [goal, rid, k]))
+        if self.pickupdone:
+            inputs.append(clingo.Function("pickup", [rid, 0]))
+        if self.deliverdone:
+            inputs.append(clingo.Function("deliver", [self.order[1], self.order[0], rid, 0]))
+
+        for pos in self.get_blocked():
+            inputs.append(clingo.Function("block", [pos]))
+
+        inputs.append(clingo.Function("available", [self.shelf]))
+
+        inputs.append(clingo.Function("order", [self.order[1], self.order[2], self.order[0], rid]))
+        return inputs
+
+    def get_plan_key(self):
+        """Canonical form of the inputs of the planning program (key of the plan cache)"""
+        return (self.encoding, self.highways, self.shelf, (self.pos[0], self.pos[1]), tuple(self.get_goals()),
+                self.pickupdone, self.deliverdone, tuple(self.get_blocked()))
+
+    def get_cached_plan(self):
+        """Returns the cached plan for the current inputs (None if there is no plan cache or the plan is not cached)"""
+        if self.plan_cache is None:
+            return None
+        return self.plan_cache.get(self.get_plan_key(), self.id, self.order)
+
+    def cache_plan(self, model: List[clingo.Symbol]) -> None:
+        if self.plan_cache is not None:
+            self.plan_cache.put(self.get_plan_key(), model, self.id, self.order)
+
+    def get_parts(self):
+        """Returns the program parts which are grounded for a plan (used if the flag -e is not used)"""
+        parts = [("base", []), ("decentralizedNoExternals", [self.id])]
+        if self.highways:
+            parts.append(("highways", []))
+        return parts
+
     def process_model(self) -> bool:
         found_model = False
 
         if self.model:
             found_model = True
-            for atom in self.model:
-                if atom.name == "chooseShelf":
-                    self.shelf = atom.arguments[0].number
-                elif (atom.name == "putdown" and self.domain == "b") or (atom.name == "pickup"):
-                    self.plan_length = atom.arguments[1].number
-                elif atom.name == "deliver" and self.domain == "b":
-                    if self.plan_length < atom.arguments[3].number:
-                        self.plan_length = atom.arguments[3].number
+            if self.model.shelf != -1:
+                self.shelf = self.model.shelf
+            # the plan ends with the putdown (domain b) or the pickup
+            t = self.model.get_last(PUTDOWN) if self.domain == "b" else -1
+            if t == -1:
+                t = self.model.get_last(PICKUP)
+            if t != -1:
+                self.plan_length = t
+            if self.domain == "b" and self.plan_length < self.model.get_last(DELIVER):
+                self.plan_length = self.model.get_last(DELIVER)
 
         if not found_model:
             self.plan_length = -1
             self.next_action = clingo.Function("", [])
             if self.shelf == -1:
-                if self.external:
-                    self.prg.assign_external(clingo.Function("order", [self.order[1], self.order[2], self.order[0],
-                                                                       self.id]), False)
-                    for shelf in self.available_shelves:
-                        self.prg.assign_external(clingo.Function("available", [shelf]), False)
                 self.available_shelves = []
 
         return found_model
 
+    @timed("planning")
     def find_new_plan(self):
         """Makes the robot solve for a new plan and keeps the old plan saved
         If you dont want to compare the old and new plan use solve() instead"""
-        self.old_model = list(self.model)
+        self.old_model = self.model
         self.old_plan_length = self.plan_length
 
-        self.model = []
+        self.model = Plan()
 
         if not self.add_inputs():
             return False
 
-        if not self.external:
-            parts = [("base", []), ("decentralizedNoExternals", [self.id])]
-            if self.highways:
-                parts.append(("highways", []))
-            self.prg.ground(parts)
+        self.start = list(self.pos)
+        self.plan_finished = False
+
+        model = self.get_cached_plan()
+        if model is None:
+            model = self.compute_plan()
+            self.plans += 1
+            self.cache_plan(model)
+        self.model = Plan(self.id, model)
+
+        return self.process_model()
+
+    def compute_plan(self) -> List[clingo.Symbol]:
+        """Finds a plan for the current inputs with the planner backend (planning program or native planner)"""
+        if self.planner is not None:
+            return self.plan_native()
+
+        # with an adaptive horizon the horizon is extended until there is a plan
+        for i, bound in enumerate(self.get_bounds()):
+            self.extensions += i > 0
+            if self.external:
+                self.assign_inputs(bound)
+                model = self.solve(self.program.prg, "plan")
+            else:
+                self.create_program(bound)
+                self.ground(self.get_parts())
+                model = self.solve(self.prg, "plan")
+            if model:
+                break
+        if self.external:
+            # the model is found for the robot of the persistent program
+            model = [rebase(atom, self.id, self.order) for atom in model]
+        return model
+
+    def plan_native(self) -> List[clingo.Symbol]:
+        return self.planner.plan(self.id, self.pos, self.get_goals(), self.order, self.pickupdone, self.deliverdone,
+                                 self.get_blocked(), self.shelf)
+
+    @timed("planning")
+    def prepare_plan(self) -> bool:
+        """Same as find_new_plan, but the planning program is solved by solve_plan (e.g. in another process)
+        Assigns the shelf, solve_plan has to be called with get_plan_task() and the result passed to finish_plan
+        (not for the flag -e)"""
+        self.old_model = self.model
+        self.old_plan_length = self.plan_length
+
+        self.model = Plan()
+
+        # assign a shelf and generate the goals
+        if self.shelf == -1:
+            return self.generate_goals()
+        return True
+
+    def get_plan_task(self):
+        """Returns the arguments for solve_plan"""
+        # the inputs are passed as text as clingo symbols can not be pickled
+        return self.encoding, to_text(self.get_inputs()), self.get_parts(), self.get_bounds(), self.benchmark
+
+    def finish_plan(self, model: List[clingo.Symbol], stats: List[Optional[Tuple[float, float, dict]]]) -> bool:
+        """Uses the model found by solve_plan, returns True if a plan was found"""
+        self.groundings += len(stats)
+        self.extensions += len(stats) - 1
+        if self.benchmark:
+            for ground_time, solve_time, program_stats in stats:
+                self.benchmarker.add_solve("plan", ground_time, solve_time, program_stats)
+                self.benchmarker.output(program_stats, "plan")
+        self.plans += 1
+        self.cache_plan(model)
+
+        return self.use_cached_plan(model)
 
+    def use_cached_plan(self, model: List[clingo.Symbol]) -> bool:
+        """Uses a model which was found without solving (after prepare_plan), returns True if a plan was found"""
         self.start = list(self.pos)
         self.plan_finished = False
 
-        self.model = self.solve(self.prg, "plan")
+        self.model = Plan(self.id, model)
 
         return self.process_model()
 
@@ -223,23 +410,34 @@ class Robot(object):
 
     def get_next_action(self):
         """Update the next_action variable"""
-        next_action = False
-        for atom in self.model:
-            if atom.name == "move" and atom.arguments[2].number == self.t + 1:
-                self.next_action = atom
-                self.next_pos[0] = self.pos[0] + atom.arguments[0].arguments[0].number
-                self.next_pos[1] = self.pos[1] + atom.arguments[0].arguments[1].number
-                next_action = True
-            elif (atom.name in ["pickup", "putdown"] and atom.arguments[1].number == self.t + 1) or (
-                    atom.name == "deliver" and atom.arguments[3].number == self.t + 1):
-                self.next_action = atom
-                next_action = True
-        if not next_action:
+        action = self.model.get_action(self.t + 1)
+        if action is not None:
+            self.next_action = action
+            if action.name == "move":
+                dx, dy = self.model.get_move(self.t + 1)
+                self.next_pos = [self.pos[0] + dx, self.pos[1] + dy]
+        else:
             self.plan_finished = True
             # if a robot is deadlocked we still need to know its next position to prevent conflicts
             self.next_pos = list(self.pos)  # needed for shortest_replanning strategy
             self.next_action = clingo.Function("", [])
 
+    def get_moves(self) -> int:
+        """Returns the number of the next timesteps in which the robot only moves along its plan"""
+        if self.plan_finished or self.waiting or self.next_action.name != "move":
+            return 0
+        return self.model.get_moves(self.t)
+
+    def skip(self, steps: int) -> Tuple[array, array]:
+        """Performs the next steps moves at once (at most get_moves), returns the directions of the moves"""
+        i = self.t - self.model.offset
+        dx, dy = self.model.dx[i:i + steps], self.model.dy[i:i + steps]
+        self.pos = [self.pos[0] + sum(dx), self.pos[1] + sum(dy)]
+        self.t += steps - 1
+        self.get_next_action()
+        self.t += 1
+        return dx, dy
+
     def action(self):
         """Make the current action
         Update state variables (and externals)"""
@@ -253,9 +451,6 @@ class Robot(object):
                 if name == "putdown":
                     self.pickupdone = False
                     self.deliverdone = False
-                    if self.external:
-                        self.prg.assign_external(clingo.Function("deliver", [self.order[1], self.order[0], self.id, 0]),
-                                                 self.deliverdone)
                 else:
                     if name == "move":
                         self.pos = list(self.next_pos)
@@ -288,71 +483,20 @@ class Robot(object):
 
         self.order = list(order)
         self.available_shelves = list(available_shelves)
-        if self.external:
-            self.prg.assign_external(clingo.Function("order", [self.order[1], self.order[2], self.order[0], self.id]),
-                                     True)
-            for shelf in self.available_shelves:
-                self.prg.assign_external(clingo.Function("available", [shelf]), True)
 
     def release_order(self):
-        """Deactivate external for current order"""
-        if self.external:
-            self.prg.assign_external(clingo.Function("order", [self.order[1], self.order[2], self.order[0], self.id]),
-                                     False)
-            for shelf in self.available_shelves:
-                self.prg.assign_external(clingo.Function("available", [shelf]), False)
+        """Release the current order (its externals are reset with the inputs of the next plan)"""
         self.shelf = -1
 
-    def update_state(self, state):
-        """Update the state matrix
+    def update_state(self, world):
+        """Update the state
         Robot can only look onto the positions it can move onto
         All other positions are assumed to be free"""
-        if not self.state:
-            for i in range(len(state)):
-                self.state.append([])
-                for j in range(len(state[0])):
-                    self.state[i].append(1)
-        for i in range(len(state)):
-            for j in range(len(state[0])):
-                if ((i == self.pos[0] - 1 and abs(j - (self.pos[1] - 1)) == 1) or
-                        (abs(i - (self.pos[0] - 1)) == 1 and j == self.pos[1] - 1)):
-                    # robot can only see at positions that he can look at
-                    self.state[i][j] = state[i][j]
-                else:
-                    # All other positions are considered free
-                    self.state[i][j] = 1
-                    
+        self.state = world.neighbours(self.pos)
+
     def set_goals(self):
-        self.prg_goals = clingo.Control(self.clingo_arguments)
-        self.prg_goals.load(self.instance)
-        self.prg_goals.load("./encodings/goals.lp")
-        
-        
-        self.prg_goals.add("base", [], "start((" + str(self.pos[0]) + "," + str(self.pos[1]) + ")," + str(self.id) + ").")
-        self.prg_goals.add("base", [], "robot(" + str(self.id) + ").")
-        for shelf in self.available_shelves:
-            self.prg_goals.add("base", [], "available(" + str(shelf) + ").")
-        
-        self.prg_goals.add("base", [], "order(" + str(self.order[1]) + ", " + str(self.order[2]) + "," + str(
-            self.order[0]) + "," + str(self.id) + ").")
-        
-        self.prg_goals.ground([("base", [])])
-        found_model_goals = False
-        with self.prg_goals.solve(yield_=True) as h:
-            for m in h:
-                found_model_goals = True
-                opt = m
-            if found_model_goals:
-                for atom in opt.symbols(shown=True):
-                    if atom.name == "chooseShelf":
-                        self.shelf = atom.arguments[0].number
-                    if atom.name == "goal":
-                        if atom.arguments[2].number == 1:
-                            self.goalA = (atom.arguments[0].arguments[0].number,atom.arguments[0].arguments[1].number)
-                        if atom.arguments[2].number == 2:
-                            self.goalB = (atom.arguments[0].arguments[0].number,atom.arguments[0].arguments[1].number)
-                        if atom.arguments[2].number == 3:
-                            self.goalC = (atom.arguments[0].arguments[0].number,atom.arguments[0].arguments[1].number)
+        """Same as generate_goals"""
+        self.generate_goals()
 
 
 class RobotSequential(Robot):
@@ -366,7 +510,7 @@ class RobotSequential(Robot):
             return False
         if self.next_action.name == "move":
             # next_pos is not a blocked position
-            return self.state[self.next_pos[0] - 1][self.next_pos[1] - 1]
+            return self.state.get((self.next_pos[0], self.next_pos[1]), 1)
         else:
             # pickup, deliver, putdown can always be done
             return True
@@ -377,7 +521,7 @@ class RobotShortest(Robot):
         """Continue using the old plan
         Used when new plan of other robot in conflict better
         or there is a deadlock with the new plan"""
-        self.model = list(self.old_model)
+        self.model = self.old_model
         self.plan_length = self.old_plan_length
 
         self.t -= 1
@@ -407,12 +551,7 @@ class RobotCrossing(Robot):
         self.replanned = False
 
         self.crossroad_encoding = "./encodings/crossroad.lp"
-
-        if self.external:
-            self.crossroad = clingo.Control(self.clingo_arguments)
-            self.crossroad.load(self.crossroad_encoding)
-            self.crossroad.load(self.instance)
-            self.crossroad.ground([("base", []), ("external", [self.id])])
+        self.crossing_table = None  # CrossingTable used instead of crossroad.lp (None if clingo is used)
 
     def action(self):
         if self.cross_done == self.t:
@@ -429,22 +568,23 @@ class RobotCrossing(Robot):
 
         return super().action()
 
+    @timed("crossroads")
     def find_crossroad(self):
         """Find the nearest crossroad
         Similar to solve but with crossroad encoding"""
-        if self.external:
-            self.crossroad.assign_external(clingo.Function("start", [(self.pos[0], self.pos[1]), self.id]), True)
-            for cross in self.blocked_crossings:
-                self.crossroad.assign_external(clingo.Function("block", [(cross[0], cross[1])]), True)
-        else:
-            self.crossroad = clingo.Control(self.clingo_arguments)
-            self.crossroad.load(self.crossroad_encoding)
-            self.crossroad.load(self.instance)
-            self.crossroad.add("base", [], "start((" + str(self.pos[0]) + "," + str(self.pos[1]) + ")," + str(self.id) +
-                               ").")
-            for cross in self.blocked_crossings:
-                self.crossroad.add("base", [], "block((" + str(cross[0]) + ", " + str(cross[1]) + ")).")
-            self.crossroad.ground([("base", []), ("noExternal", [self.id])])
+        if self.crossing_table is not None:
+            self.cross_length, self.cross_model = self.crossing_table.find_crossroad(self.id, self.pos,
+                                                                                   self.blocked_crossings)
+            return
+
+        # the crossroad program is always grounded for the current start (also with the flag -e):
+        # grounded for all starts it is larger than all groundings for single starts during a run
+        self.crossroad = clingo.Control(self.clingo_arguments)
+        self.crossroad.load(self.crossroad_encoding)
+        self.instance.load(self.crossroad)
+        self.facts.add(self.crossroad, [clingo.Function("start", [(self.pos[0], self.pos[1]), self.id])] +
+                       [clingo.Function("block", [(cross[0], cross[1])]) for cross in self.blocked_crossings])
+        self.ground_program(self.crossroad, [("base", []), ("noExternal", [self.id])], "conflict")
 
         self.cross_model = self.solve(self.crossroad, "conflict")
         if self.cross_model:
@@ -458,11 +598,6 @@ class RobotCrossing(Robot):
         # cross_model needs to be sorted in ascending order
         self.cross_model.sort(key=lambda atom: atom.arguments[2].number)
 
-        if self.external:
-            self.crossroad.assign_external(clingo.Function("start", [(self.pos[0], self.pos[1]), self.id]), False)
-            for cross in self.blocked_crossings:
-                self.crossroad.assign_external(clingo.Function("block", [(cross[0], cross[1])]), False)
-
     def reset_crossing(self):
         """Reinitialize all crossing related variables"""
         self.cross_model = []
@@ -519,61 +654,21 @@ class RobotCrossing(Robot):
         # total time added by dodging
         total_t = 2 * self.cross_length
 
-        # generate part of the model for returning from crossing
-        return_model = []
+        # the moves to the crossing (cross_model is sorted) and the inverted moves for returning from the crossing
+        moves = []
         for atom in self.cross_model:
             if atom.name == "move":
-                # invert directions and time
-                return_model.append(clingo.Function("move",
-                                                    [(-1 * atom.arguments[0].arguments[0].number,
-                                                      -1 * atom.arguments[0].arguments[1].number),
-                                                     atom.arguments[1].number,
-                                                     total_t - (atom.arguments[2].number - 1)]))
-
-        # merge cross_model and model to new_model
-        new_model = []
-        # first make space for cross_model
-        for atom in self.model:
+                moves.append((atom.arguments[2].number + self.t - 1, atom.arguments[0].arguments[0].number,
+                              atom.arguments[0].arguments[1].number))
+        for atom in self.cross_model:
             if atom.name == "move":
-                # already done steps can be copied
-                if atom.arguments[2].number < self.t:
-                    new_model.append(atom)
-                # steps in future have to be move back total_t timesteps
-                else:
-                    new_model.append(clingo.Function(atom.name, [(atom.arguments[0].arguments[0].number,
-                                                                  atom.arguments[0].arguments[1].number),
-                                                                 atom.arguments[1].number,
-                                                                 atom.arguments[2].number + total_t]))
-            # same thing for all other action atoms
-            elif atom.name in ["pickup", "putdown"]:
-                if atom.arguments[1].number < self.t:
-                    new_model.append(atom)
-                else:
-                    new_model.append(
-                        clingo.Function(atom.name, [atom.arguments[0].number, atom.arguments[1].number + total_t]))
-            elif atom.name == "deliver":
-                if atom.arguments[3].number < self.t:
-                    new_model.append(atom)
-                else:
-                    new_model.append(clingo.Function(atom.name,
-                                                     [atom.arguments[0].number, atom.arguments[1].number,
-                                                      atom.arguments[2].number, atom.arguments[3].number + total_t]))
-            else:
-                new_model.append(atom)
+                moves.append((total_t - (atom.arguments[2].number - 1) + self.t - 1,
+                              -1 * atom.arguments[0].arguments[0].number, -1 * atom.arguments[0].arguments[1].number))
 
-        # add cross_model
-        for atom in self.cross_model:
-            new_model.append(clingo.Function(atom.name, [(atom.arguments[0].arguments[0].number,
-                                                          atom.arguments[0].arguments[1].number),
-                                                         atom.arguments[1].number,
-                                                         atom.arguments[2].number + self.t - 1]))
-        for atom in return_model:
-            new_model.append(clingo.Function(atom.name, [(atom.arguments[0].arguments[0].number,
-                                                          atom.arguments[0].arguments[1].number),
-                                                         atom.arguments[1].number,
-                                                         atom.arguments[2].number + self.t - 1]))
-
-        self.model = new_model
+        # already done steps stay the same, steps in future are moved back total_t timesteps
+        self.model = self.model.insert(self.t, total_t, moves)
+        # the dodge replaces a wait of the robot in this timestep
+        self.waiting = False
         self.t -= 1
         self.get_next_action()
         self.t += 1
@@ -583,11 +678,9 @@ class RobotCrossing(Robot):
         self.blocked_crossings = list(crossings)
 
     def clear_state(self):
-        """Reset the state matrix"""
+        """Reset the state"""
         # mark all positions as free
-        for i in range(len(self.state)):
-            for j in range(len(self.state[0])):
-                self.state[i][j] = 1
+        self.state = {}
 
 
 class RobotPrioritized(Robot):
@@ -596,32 +689,29 @@ class RobotPrioritized(Robot):
         super().__init__(rid, start, encoding, domain, instance, external, highways, clingo_arguments, benchmark,
                          benchmarker)
 
-        self.additional_inputs = []
+        self.additional_inputs: List[Plan] = []  # plans of the other robots
         self.blocked_positions = []
+        # persistent program in which the plans of the other robots are grounded (None if they changed, flag -e)
+        self.reservations_program = None
 
+    @timed("planning")
     def plan(self):
         # similar to Robot.solve() / Robot.find_new_plan()
         # but needs to add the additional input to the program
         # and clear additional inputs after solving
-        self.model = []
-        
-        self.add_inputs()
-
-        for atom in self.additional_inputs:
-            self.prg.add("base", [], atom)
+        self.model = Plan()
 
-        for pos in self.blocked_positions:
-            self.prg.add("base", [], "blockAll(" + str(pos) + ").")
-
-        parts = [("base", []), ("decentralizedNoExternals", [self.id])]
-        if self.highways:
-            parts.append(("highways", []))
-        self.prg.ground(parts)
+        self.add_inputs()
 
         self.start = list(self.pos)
         self.plan_finished = False
 
-        self.model = self.solve(self.prg, "plan")
+        model = self.get_cached_plan()
+        if model is None:
+            model = self.compute_plan()
+            self.plans += 1
+            self.cache_plan(model)
+        self.model = Plan(self.id, model)
 
         self.process_model()
 
@@ -633,22 +723,49 @@ class RobotPrioritized(Robot):
         else:
             return False
 
-    def get_plan(self, offset):
-        # returns all pos and move atoms from current timestep on
-        # and maps the timesteps of these atoms
-        # i.e. such that the next action is t=1 and so on
-        plan = []
-        for atom in self.model:
-            if (atom.name == "pos" and atom.arguments[2].number >= self.t + offset - 1) or (
-                    atom.name == "move" and atom.arguments[2].number >= self.t + offset):
-                plan.append(atom.name + "((" + str(atom.arguments[0].arguments[0]) + "," +
-                            str(atom.arguments[0].arguments[1]) + ")," + str(atom.arguments[1].number) + "," +
-                            str(atom.arguments[2].number - (self.t + offset - 1)) + ").")
-
-        return plan
-
-    def add_plan(self, plan):
-        self.additional_inputs += plan
+    def get_inputs(self, rid: Optional[int] = None) -> List[clingo.Symbol]:
+        # the plans of the other robots are added as pos/3 and move/3 facts
+        inputs = super().get_inputs(rid) + get_facts(self.additional_inputs)
+        for pos in self.blocked_positions:
+            inputs.append(clingo.Function("blockAll", [pos]))
+        return inputs
+
+    def compute_plan(self) -> List[clingo.Symbol]:
+        # the plans of the other robots may have changed since the last plan
+        self.reservations_program = None
+        return super().compute_plan()
+
+    def plan_native(self) -> List[clingo.Symbol]:
+        reserved, reserved_moves = get_reservations(self.additional_inputs)
+        return self.planner.plan(self.id, self.pos, self.get_goals(), self.order, self.pickupdone, self.deliverdone,
+                                 self.get_blocked(), self.shelf, reserved, reserved_moves, set(self.blocked_positions))
+
+    def get_plan_key(self):
+        # the plans of the other robots and the blocked positions are also inputs
+        return super().get_plan_key() + (get_key(self.additional_inputs), tuple(self.blocked_positions))
+
+    def ground_inputs(self) -> None:
+        """Grounds the plans of the other robots in the persistent program and sets the externals of the blocked
+        positions (replaces adding the plans as facts when externals are used)
+        The plans are grounded once for each plan of the robot, they only hold while the external plan(p) is true"""
+        if self.reservations_program is self.program.prg:
+            return
+        p = self.program.get_inputs_id()
+        reserved, reserved_moves = get_reservations(self.additional_inputs)
+        parts = [("plan", [p])]
+        parts += [("reserved", [PROGRAM_ROBOT, pos, t, p]) for pos, t in reserved]
+        # the robot can not move onto the position the other robot comes from
+        parts += [("reservedMove", [PROGRAM_ROBOT, pos, (-dx, -dy), t, p]) for pos, (dx, dy), t in reserved_moves]
+        self.ground_program(self.program.prg, parts, "plan")
+        self.reservations_program = self.program.prg
+
+        atoms = [clingo.Function("plan", [p])]
+        atoms += [clingo.Function("blockAll", [pos]) for pos in self.blocked_positions]
+        self.externals["reservations"] = atoms
+
+    def add_plan(self, plan: Plan) -> None:
+        """Adds the plan of another robot (from the reservation table, timestep 0 is the current timestep)"""
+        self.additional_inputs.append(plan)
 
     def clear_additional_input(self):
         self.additional_inputs = []
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# the modules of the repository are imported from its root directory (like pathfind.py does)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,43 @@
+from itertools import permutations
+
+from assignment import min_cost_assignment
+
+import numpy as np
+import pytest
+
+
+def min_cost_permutations(costs):
+    """Brute force: minimal total cost over all assignments of rows to distinct columns (inf if there is none)"""
+    rows = range(costs.shape[0])
+    return min((sum(costs[i, j] for i, j in zip(rows, columns))
+                for columns in permutations(range(costs.shape[1]), costs.shape[0])), default=np.inf)
+
+
+def test_example():
+    costs = np.array([[4., 1., 3.], [2., 0., 5.], [3., 2., 2.]])
+    assert min_cost_assignment(costs) == [1, 0, 2]
+
+
+def test_infeasible():
+    # more rows than columns
+    assert min_cost_assignment(np.ones((3, 2))) == []
+    # both rows can only be assigned to column 0
+    assert min_cost_assignment(np.array([[1., np.inf], [2., np.inf]])) == []
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_costs(seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(20):
+        n = int(rng.integers(1, 6))
+        m = int(rng.integers(n, 7))
+        # small integer costs (many ties) with some infeasible entries
+        costs = rng.integers(0, 5, (n, m)).astype(float)
+        costs[rng.random((n, m)) < 0.3] = np.inf
+        expected = min_cost_permutations(costs)
+        columns = min_cost_assignment(costs)
+        if expected == np.inf:
+            assert columns == []
+            continue
+        assert len(columns) == n and len(set(columns)) == n
+        assert sum(costs[i, j] for i, j in enumerate(columns)) == expected
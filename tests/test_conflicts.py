@@ -0,0 +1,87 @@
+from conflicts import find_conflicts_ahead
+
+import numpy as np
+import pytest
+
+# directions of the moves (the first one is waiting)
+DIRECTIONS = np.array([(0, 0), (1, 0), (-1, 0), (0, 1), (0, -1)])
+
+
+def find_conflicts_pairwise(ids, x, y):
+    """Brute force version of find_conflicts_ahead: every pair of robots at every timestep"""
+    earliest = {}
+    for s in range(1, x.shape[1]):
+        for a in range(len(ids)):
+            for b in range(len(ids)):
+                if a == b:
+                    continue
+                pos_a, pos_b = (x[a, s], y[a, s]), (x[b, s], y[b, s])
+                before_a, before_b = (x[a, s - 1], y[a, s - 1]), (x[b, s - 1], y[b, s - 1])
+                moved_a, moved_b = pos_a != before_a, pos_b != before_b
+                conflict = None
+                if pos_a == pos_b and moved_a and moved_b and ids[a] < ids[b]:
+                    conflict = (s, ids[a], ids[b], "conflict", pos_a)
+                elif pos_a == pos_b and moved_a and not moved_b:
+                    conflict = (s, ids[a], ids[b], "conflictW", pos_a)
+                elif pos_a == before_b and pos_b == before_a and moved_a and ids[a] < ids[b]:
+                    conflict = (s, ids[a], ids[b], "swap", before_b)
+                if conflict is not None:
+                    pair = (min(ids[a], ids[b]), max(ids[a], ids[b]))
+                    if pair not in earliest or conflict < earliest[pair]:
+                        earliest[pair] = conflict
+    return sorted(earliest.values())
+
+
+def normalize(conflicts):
+    return [(int(s), int(r1), int(r2), name, (int(pos[0]), int(pos[1]))) for s, r1, r2, name, pos in conflicts]
+
+
+def random_trajectories(rng, robots, steps, size):
+    """Random walks on a size x size grid from distinct start positions,
+    the plans of some robots end before the last timestep"""
+    cells = rng.choice(size * size, robots, replace=False)
+    start = np.stack([cells % size + 1, cells // size + 1], axis=1)
+    moves = DIRECTIONS[rng.integers(0, len(DIRECTIONS), (robots, steps))]
+    for i in range(robots):
+        end = rng.integers(0, steps + 1)
+        moves[i, end:] = 0
+    positions = [start]
+    for step in range(steps):
+        # moves off the grid become waits
+        positions.append(np.clip(positions[-1] + moves[:, step], 1, size))
+    positions = np.stack(positions, axis=1)
+    return positions[:, :, 0], positions[:, :, 1]
+
+
+def test_examples():
+    # 1 and 2 swap, 3 moves onto the waiting robot 4, 5 and 6 move onto the same position
+    x = np.array([[1, 2, 3], [2, 1, 0], [5, 6, 7], [7, 7, 7], [10, 11, 12], [12, 11, 10]])
+    y = np.ones((6, 3), dtype=int)
+    assert normalize(find_conflicts_ahead([1, 2, 3, 4, 5, 6], x, y)) == [
+        (1, 1, 2, "swap", (2, 1)), (1, 5, 6, "conflict", (11, 1)), (2, 3, 4, "conflictW", (7, 1))]
+
+
+def test_earliest_conflict_per_pair():
+    # the robots first move onto the same position, then swap, then meet again
+    x = np.array([[1, 2, 3, 2, 2], [3, 2, 2, 3, 2]])
+    y = np.ones((2, 5), dtype=int)
+    assert normalize(find_conflicts_ahead([4, 2], x, y)) == [(1, 2, 4, "conflict", (2, 1))]
+
+
+def test_no_conflicts():
+    x = np.array([[1, 2, 3], [1, 2, 3]])
+    y = np.array([[1, 1, 1], [2, 2, 2]])
+    assert find_conflicts_ahead([1, 2], x, y) == []
+    assert find_conflicts_ahead([1], x[:1], y[:1]) == []
+    assert find_conflicts_ahead([1, 2], x[:, :1], y[:, :1]) == []
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_trajectories(seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(25):
+        robots, steps = int(rng.integers(2, 12)), int(rng.integers(1, 8))
+        # a small grid, so there are many conflicts at the same timestep
+        x, y = random_trajectories(rng, robots, steps, 4)
+        ids = [int(rid) for rid in rng.permutation(50)[:robots] + 1]
+        assert normalize(find_conflicts_ahead(ids, x, y)) == normalize(find_conflicts_pairwise(ids, x, y))
@@ -0,0 +1,36 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+class World(object):
+    def __init__(self, width: int, height: int, robots: List[int]) -> None:
+        """Shared state of the warehouse
+        grid: occupancy grid indexed by [x-1, y-1] (1=free, 0=blocked)
+        positions/next_positions: position and next position of every robot (row index[rid])
+        """
+        self.width: int = width
+        self.height: int = height
+        self.grid: np.ndarray = np.ones((width, height), dtype=np.int8)
+
+        self.index: Dict[int, int] = {rid: i for i, rid in enumerate(robots)}
+        self.positions: np.ndarray = np.full((len(robots), 2), -1, dtype=np.int64)
+        self.next_positions: np.ndarray = np.full((len(robots), 2), -1, dtype=np.int64)
+
+    def block(self, pos: List[int]) -> None:
+        self.grid[pos[0] - 1, pos[1] - 1] = 0
+
+    def free(self, pos: List[int]) -> None:
+        self.grid[pos[0] - 1, pos[1] - 1] = 1
+
+    def reset(self) -> None:
+        """Marks all positions as free"""
+        self.grid.fill(1)
+
+    def neighbours(self, pos: List[int]) -> Dict[Tuple[int, int], int]:
+        """Returns the state of all positions a robot on pos can move onto (sorted by position)"""
+        neighbours = {}
+        for x, y in ((pos[0] - 1, pos[1]), (pos[0], pos[1] - 1), (pos[0], pos[1] + 1), (pos[0] + 1, pos[1])):
+            if 1 <= x <= self.width and 1 <= y <= self.height:
+                neighbours[(x, y)] = int(self.grid[x - 1, y - 1])
+        return neighbours